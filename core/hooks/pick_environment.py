@@ -10,9 +10,25 @@
 
 """
 Hook which chooses an environment file to use based on the current context.
+
+The first time an environment is picked in a process, the parsed yaml of its
+whole include graph is loaded into the core yaml cache from a per-user
+snapshot, so switching environments does not re-read and re-parse the env
+files. Snapshots are validated against the modification time and size of
+every file that contributed to them and rebuilt when any of them changed.
 """
 
+import os
+import pickle
+import hashlib
+import threading
+
 from tank import Hook
+from tank.util.yaml_cache import g_yaml_cache
+
+# environment names whose include graph has been loaded in this process
+_loaded_environments = set()
+_loaded_environments_lock = threading.Lock()
 
 
 class PickEnvironment(Hook):
@@ -21,6 +37,22 @@ class PickEnvironment(Hook):
         The default implementation assumes there are three environments, called shot, asset
         and project, and switches to these based on entity type.
         """
+        env_name = self._pick_environment(context)
+
+        if env_name:
+            try:
+                self._load_environment_cache(env_name)
+            except Exception as e:
+                self.logger.debug(
+                    "Could not use the yaml cache of environment %s: %s" % (env_name, e)
+                )
+
+        return env_name
+
+    def _pick_environment(self, context):
+        """
+        Return the name of the environment to use for the given context.
+        """
         if context.source_entity:
             if context.source_entity["type"] == "Version":
                 return "version"
@@ -54,3 +86,115 @@ class PickEnvironment(Hook):
                 return "asset_step"
 
         return None
+
+    def _load_environment_cache(self, env_name):
+        """
+        Populate the core yaml cache with the include graph of an environment,
+        from its snapshot if still valid, otherwise by parsing the graph once
+        and writing a new snapshot.
+        """
+        with _loaded_environments_lock:
+            if env_name in _loaded_environments:
+                return
+
+        config_path = self.parent.pipeline_configuration.get_config_location()
+        env_path = os.path.join(config_path, "env", "%s.yml" % env_name)
+        if not os.path.exists(env_path):
+            return
+
+        snapshot_path = os.path.join(
+            _get_cache_root(),
+            hashlib.sha1(config_path.encode("utf-8")).hexdigest(),
+            "%s.pickle" % env_name,
+        )
+
+        try:
+            with open(snapshot_path, "rb") as fh:
+                snapshot = pickle.load(fh)
+            if all(_stat_file(path) == stat for path, stat in snapshot["files"].items()):
+                g_yaml_cache.merge_cache_items(snapshot["items"])
+                self.logger.debug("Loaded yaml cache of environment %s." % env_name)
+                _set_environment_loaded(env_name)
+                return
+        except (IOError, OSError, EOFError, KeyError, pickle.UnpicklingError):
+            pass
+
+        paths = _get_include_graph(env_path)
+        snapshot = {
+            "files": dict((path, _stat_file(path)) for path in paths),
+            "items": [
+                item
+                for item in g_yaml_cache.get_cached_items()
+                if os.path.normpath(item.path) in paths
+            ],
+        }
+
+        snapshot_folder = os.path.dirname(snapshot_path)
+        if not os.path.isdir(snapshot_folder):
+            os.makedirs(snapshot_folder)
+        with open(snapshot_path + ".tmp", "wb") as fh:
+            pickle.dump(snapshot, fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+        self.logger.debug("Wrote yaml cache of environment %s." % env_name)
+        _set_environment_loaded(env_name)
+
+
+def _set_environment_loaded(env_name):
+    """
+    Remember that the yaml cache of an environment is loaded, only done once
+    it succeeded so that a failed load is tried again on the next pick.
+    """
+    with _loaded_environments_lock:
+        _loaded_environments.add(env_name)
+
+
+def _get_cache_root():
+    """
+    Return the folder environment snapshots are stored in.
+
+    The location can be overridden with the TK_ENV_CACHE_DIR environment
+    variable, otherwise a folder in the user's home directory is used.
+    """
+    return os.environ.get("TK_ENV_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "tk-config", "env"
+    )
+
+
+def _stat_file(path):
+    """
+    Return the modification time and size of a file, or None if it is gone.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return (stat.st_mtime, stat.st_size)
+
+
+def _get_include_graph(env_path):
+    """
+    Parse an environment file and everything it includes through the core
+    yaml cache, and return the normalized paths of all of them.
+    """
+    paths = set()
+    pending = [os.path.normpath(env_path)]
+
+    while pending:
+        path = pending.pop()
+        if path in paths or not os.path.exists(path):
+            continue
+        paths.add(path)
+
+        data = g_yaml_cache.get(path, deepcopy_data=False) or {}
+        for include in data.get("includes") or []:
+            # includes can be platform specific dictionaries. only plain
+            # paths, relative to the including file or absolute, are followed.
+            if not isinstance(include, str):
+                continue
+            include = os.path.expanduser(os.path.expandvars(include))
+            if not os.path.isabs(include):
+                include = os.path.join(os.path.dirname(path), include)
+            pending.append(os.path.normpath(include))
+
+    return paths
@@ -0,0 +1,291 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Hook which creates the folders and files computed by the folder schema.
+
+Rather than issuing one exists check and one mkdir after another, the full
+set of folders is computed first and diffed against the folders found by
+listing each parent folder once. Only the missing folders are created, one
+depth level at a time on a bounded thread pool, which keeps the number of
+round-trips to network storage low.
+
+When TK_DEFER_FOLDER_CREATION is set, folders below a schema node using
+defer_creation (dev/maya, pub/nuke...) are not created while the engine
+starts. The deferred node itself is created right away since it is the work
+area of the engine, and the folders below it are queued and created in one
+batch from a background thread once TK_DEFERRED_FOLDER_DELAY seconds have
+passed without new items being queued. Files are never deferred, and
+neither are the folders holding them.
+"""
+
+import concurrent.futures
+import errno
+import os
+import shutil
+import sys
+import threading
+
+from tank import Hook
+
+# folder items waiting to be created in the background
+_deferred_items = []
+_deferred_lock = threading.Lock()
+_deferred_timer = None
+
+
+class ProcessFolderCreation(Hook):
+    def execute(self, items, preview_mode, **kwargs):
+        """
+        Creates the folders and files of the given items using open permissions
+        and returns the list of paths that were created.
+
+        Items is a list of dictionaries with an "action" key, one of:
+
+        * "folder", "entity_folder": create "path"
+        * "symlink": link "path" to "target" (not on windows)
+        * "copy": copy "source_path" to "target_path"
+        * "create_file": write "content" to "path"
+
+        The number of threads creating folders can be set with the
+        TK_FOLDER_CREATION_WORKERS environment variable.
+        """
+        if os.environ.get("TK_DEFER_FOLDER_CREATION") and not preview_mode:
+            items = self._queue_deferred_items(items)
+
+        # set the umask so that we get true permissions
+        old_umask = os.umask(0)
+        try:
+            created = set(self._create_folders(items, preview_mode))
+            locations = []
+            for item in items:
+                action = item.get("action")
+                if action in ["entity_folder", "folder"]:
+                    path = os.path.normpath(item["path"])
+                    if path in created:
+                        locations.append(item["path"])
+                        created.discard(path)
+                else:
+                    location = self._process_file_item(item, preview_mode)
+                    if location:
+                        locations.append(location)
+        finally:
+            # reset umask
+            os.umask(old_umask)
+
+        return locations
+
+    def _create_folders(self, items, preview_mode, make_folder=None):
+        """
+        Create the missing folders of the given items and return their paths.
+        """
+        make_folder = make_folder or _make_folder
+        targets = set(
+            os.path.normpath(item["path"])
+            for item in items
+            if item.get("action") in ["entity_folder", "folder"]
+        )
+
+        missing = get_missing_folders(targets)
+        if preview_mode or not missing:
+            return missing
+
+        # parents are always created before their children, so every level
+        # can be created in parallel with plain mkdir calls.
+        levels = {}
+        for path in missing:
+            levels.setdefault(path.count(os.sep), []).append(path)
+
+        # each worker gets one slice of a level, a task per folder costs more
+        # than the mkdir itself on local storage.
+        workers = int(os.environ.get("TK_FOLDER_CREATION_WORKERS", 8))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            for depth in sorted(levels):
+                paths = levels[depth]
+                slices = [paths[x::workers] for x in range(min(workers, len(paths)))]
+                list(pool.map(lambda x: [make_folder(path) for path in x], slices))
+
+        self.logger.debug(
+            "Created %d of %d schema folders." % (len(missing), len(targets))
+        )
+
+        return missing
+
+    def _queue_deferred_items(self, items):
+        """
+        Queue the folders below deferred schema nodes for background creation
+        and return the items to process right away.
+
+        Files such as workspace.mel are needed as soon as the engine starts,
+        so they are never queued, and neither are the folders holding them.
+        """
+        roots = set(
+            os.path.normpath(item["path"])
+            for item in items
+            if (item.get("metadata") or {}).get("defer_creation")
+        )
+        if not roots:
+            return items
+
+        # folders holding a file, which have to exist before it is created
+        needed = set()
+        for item in items:
+            if item.get("action") not in ["entity_folder", "folder"]:
+                path = item.get("target_path") if item.get("action") == "copy" else item.get("path")
+                if path:
+                    parent = os.path.dirname(os.path.normpath(path))
+                    while parent not in needed and os.path.dirname(parent) != parent:
+                        needed.add(parent)
+                        parent = os.path.dirname(parent)
+
+        immediate = []
+        deferred = []
+        for item in items:
+            if item.get("action") in ["entity_folder", "folder"]:
+                path = os.path.normpath(item["path"])
+                parent = os.path.dirname(path)
+                while parent not in roots and os.path.dirname(parent) != parent:
+                    parent = os.path.dirname(parent)
+                if parent in roots and path not in needed:
+                    deferred.append(item)
+                    continue
+            immediate.append(item)
+
+        if deferred:
+            global _deferred_timer
+            with _deferred_lock:
+                _deferred_items.extend(deferred)
+                if _deferred_timer is not None:
+                    _deferred_timer.cancel()
+                delay = float(os.environ.get("TK_DEFERRED_FOLDER_DELAY", 2))
+                _deferred_timer = threading.Timer(delay, self._flush_deferred_items)
+                _deferred_timer.start()
+            self.logger.debug("Queued %d deferred schema items." % len(deferred))
+
+        return immediate
+
+    def _flush_deferred_items(self):
+        """
+        Create every queued deferred folder in one batch.
+        """
+        global _deferred_timer
+        with _deferred_lock:
+            items = list(_deferred_items)
+            del _deferred_items[:]
+            _deferred_timer = None
+
+        # the umask is shared with the threads of the running application,
+        # so permissions are set on each folder instead.
+        try:
+            self._create_folders(items, False, make_folder=_make_open_folder)
+        except Exception:
+            self.logger.exception("Failed to create deferred schema folders.")
+
+    def _process_file_item(self, item, preview_mode):
+        """
+        Process a symlink, copy or create_file item and return the path it
+        created, if any.
+        """
+        action = item.get("action")
+
+        if action == "symlink":
+            # no windows support
+            if sys.platform == "win32":
+                return None
+            path = item.get("path")
+            # note use of lexists to check existance of symlink
+            # rather than what symlink is pointing at
+            if os.path.lexists(path):
+                return None
+            if not preview_mode:
+                os.symlink(item.get("target"), path)
+            return path
+
+        if action == "copy":
+            target_path = item.get("target_path")
+            if os.path.exists(target_path):
+                return None
+            if not preview_mode:
+                # do a standard file copy and set permissions to open
+                shutil.copy(item.get("source_path"), target_path)
+                os.chmod(target_path, 0o666)
+            return target_path
+
+        if action == "create_file":
+            path = item.get("path")
+            parent_folder = os.path.dirname(path)
+            if not os.path.exists(parent_folder) and not preview_mode:
+                _make_folder(parent_folder)
+            if os.path.exists(path):
+                return None
+            if not preview_mode:
+                # create the file and set permissions to open
+                with open(path, "wb") as fh:
+                    fh.write(item.get("content"))
+                os.chmod(path, 0o666)
+            return path
+
+        return None
+
+
+def get_missing_folders(targets):
+    """
+    Return the folders of a set that do not exist on disk.
+
+    Folders are checked by listing each of their parent folders once instead
+    of one stat per folder. Nothing is remembered between calls, so a folder
+    deleted since the last folder creation is created again.
+
+    :param targets: Set of normalized folder paths
+    :returns: list of missing folder paths
+    """
+    by_parent = {}
+    for path in targets:
+        parent, name = os.path.split(path)
+        by_parent.setdefault(parent, {})[name] = path
+
+    existing = set()
+    for parent in sorted(by_parent, key=lambda x: x.count(os.sep)):
+        if parent in targets and parent not in existing:
+            # the parent is missing too, so none of its children exist
+            continue
+        names = by_parent[parent]
+        try:
+            with os.scandir(parent) as entries:
+                existing.update(
+                    names[entry.name]
+                    for entry in entries
+                    if entry.name in names and entry.is_dir()
+                )
+        except OSError:
+            continue
+
+    return sorted(targets - existing)
+
+
+def _make_folder(path):
+    """
+    Create a folder and any missing parent with open permissions.
+    """
+    try:
+        os.mkdir(path, 0o777)
+    except FileNotFoundError:
+        os.makedirs(path, 0o777, exist_ok=True)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def _make_open_folder(path):
+    """
+    Create a folder and set open permissions on it regardless of the umask.
+    """
+    _make_folder(path)
+    os.chmod(path, 0o777)
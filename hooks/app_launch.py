@@ -17,10 +17,19 @@ This hook is executed to launch the applications.
 import os
 import re
 import sys
+import json
+import contextlib
+import collections
+import hashlib
 import subprocess
 import platform
+import queue
+import socket
+import threading
+import time
 import tank
 import sgtk
+from sgtk.util.filesystem import ensure_folder_exists
 
 
 # rez package name
@@ -35,6 +44,29 @@ ENGINES = {
     'tk-aftereffects' : "afx",
     }
 
+# seconds a Software query result is reused for before ShotGrid is asked again
+SOFTWARE_CACHE_TTL = 300
+
+_software_cache = {}
+_software_cache_lock = threading.Lock()
+
+# launch manifest written by "python app_launch.py <config path>"
+MANIFEST_NAME = 'launch_manifest.json'
+MANIFEST_VERSION = 1
+
+_manifest_cache = {}
+
+# seconds to wait for the resident launcher daemon to accept a launch before
+# launching locally
+DAEMON_TIMEOUT = 10
+
+# background threads resolving rez contexts ahead of the first launch
+PREFETCH_WORKERS = 2
+
+_prefetch_queue = None
+_prefetched = set()
+_prefetch_lock = threading.Lock()
+
 
 
 class AppLaunch(tank.Hook):
@@ -62,22 +94,100 @@ class AppLaunch(tank.Hook):
             
             return {"command": cmd, "return_code": exit_code}
 
+        timer = LaunchTimer(engine_name, version)
+        result = self._launch(timer, app_path, app_args, version, engine_name)
+        timer.finish(result)
+
+        return result
+
+    def prefetch(self, engine_name, version):
+        """
+        Resolve and cache the rez context of an app in the background so that
+        its first launch does no solver work.
+
+        Called by the before_register_command hook for every launcher
+        tk-desktop registers once a project is loaded. Work is queued to a few
+        daemon threads, so exiting the process never waits on a solve, and
+        each app version is only prefetched once per session.
+
+        :param engine_name: (str) The name of the engine of the software
+        :param version: (str) version of the software
+        """
+        if engine_name not in ENGINES or not version:
+            return
+
+        with _prefetch_lock:
+            key = (engine_name, version)
+            if key in _prefetched:
+                return
+            _prefetched.add(key)
+
+            global _prefetch_queue
+            if _prefetch_queue is None:
+                _prefetch_queue = queue.Queue()
+                for _ in range(PREFETCH_WORKERS):
+                    worker = threading.Thread(target=_run_prefetch_worker, args=(_prefetch_queue,))
+                    worker.daemon = True
+                    worker.start()
+
+        _prefetch_queue.put((self._prefetch, engine_name, version))
+
+    def _prefetch(self, engine_name, version):
+
+        try:
+            app_name = ENGINES[engine_name]
+            project = get_project(self.tank)
+            manifest = load_launch_manifest(get_manifest_path(self.tank))
+            packages = get_rez_packages(self.tank.shotgun, app_name, version, sys.platform, project, manifest)
+            if not packages:
+                return
+
+            rez_path = get_adapter(platform.system()).get_rez_module_root()
+            if not rez_path:
+                return
+            with _prefetch_lock:
+                if rez_path not in sys.path:
+                    sys.path.append(rez_path)
+            from rez import resolved_context
+
+            cache = RezContextCache(get_cache_root(), logger=self.logger)
+            if cache.get(packages) is None:
+                cache.put(packages, resolved_context.ResolvedContext(packages))
+                self.logger.debug('Prefetched rez context for %s %s.' % (app_name, version))
+        except Exception as e:
+            self.logger.debug('Could not prefetch rez context for %s %s: %s' % (engine_name, version, e))
+
+    def _launch(self, timer, app_path, app_args, version, engine_name):
+        """
+        Launch a rez managed app, timing each phase of the launch.
+        """
 
         app_name = ENGINES[engine_name]
         print("-------------------------------")
         print(app_name)
         print("-------------------------------")
-        context = self.tank.context_from_path(self.tank.project_path)
-        project = context.project
-        sg = self.tank.shotgun
+        with timer.phase('project'):
+            project = get_project(self.tank)
+            sg = self.tank.shotgun
         system = sys.platform
 
         adapter = get_adapter(platform.system())               
-        packages = get_rez_packages(sg, app_name, version, system, project)
+        with timer.phase('manifest'):
+            manifest = load_launch_manifest(get_manifest_path(self.tank))
+        with timer.phase('software_query'):
+            packages = get_rez_packages(sg, app_name, version, system, project, manifest)
         print("-------------------rez packages--------------------")
         print(packages)
         print("-------------------rez packages--------------------")
-        rez_path = adapter.get_rez_module_root()
+        if packages:
+            with timer.phase('daemon'):
+                result = launch_with_daemon(packages, app_args, app_name)
+            if result:
+                self.logger.debug('Launched %s through the launcher daemon.' % app_name)
+                return result
+
+        with timer.phase('rez_root'):
+            rez_path = adapter.get_rez_module_root()
         print("---------------------rez path----------------------")
         print(rez_path)
         print("---------------------rez path----------------------")
@@ -87,54 +197,270 @@ class AppLaunch(tank.Hook):
         if not rez_path:
             raise EnvironmentError('rez is not installed and could not be automatically found. Cannot continue.')        
             
-        sys.path.append(rez_path)
-        from rez import resolved_context
+        with timer.phase('rez_import'):
+            if rez_path not in sys.path:
+                sys.path.append(rez_path)
+            from rez import resolved_context
         
         if not packages:
             self.logger.debug('No rez packages were found. The default boot, instead.')
             command = adapter.get_command(app_path, app_args)
-            return_code = os.system(command)
+            with timer.phase('spawn'):
+                return_code = os.system(command)
             print("===================")
             print("===================")
 
             return {'command': command, 'return_code': return_code}
 
-        context = resolved_context.ResolvedContext(packages)
+        with timer.phase('cache_lookup'):
+            cache = RezContextCache(get_cache_root(), logger=self.logger)
+            context = cache.get(packages)
+        if context is None:
+            with timer.phase('solve'):
+                context = resolved_context.ResolvedContext(packages)
+            with timer.phase('cache_store'):
+                cache.put(packages, context)
 
-        return adapter.execute(context, app_args, app_name)
+        with timer.phase('spawn'):
+            return adapter.execute(context, app_args, app_name)
 
-def get_rez_packages(sg, app_name, version, system, project):
-    
-    if system == "linux":
-        filter_dict = [
-            ['code', 'is', app_name.title() + " " + version],
-            ['projects', 'in', project]
-            ]
-        packages = sg.find("Software", filter_dict, ['sg_rez'])
-        if packages : 
-            packages =  packages[0]['sg_rez']
+
+def _run_prefetch_worker(tasks):
+    """
+    Run queued prefetches for as long as the process lives.
+    """
+    while True:
+        func, engine_name, version = tasks.get()
+        func(engine_name, version)
+
+
+class LaunchTimer(object):
+    """
+    Records the wall time of each phase of a launch.
+
+    The finished record is attached to the launch result under 'timings'.
+    When TK_LAUNCH_TIMING_LOG is set, it is also appended to that file as a
+    json line.
+    """
+
+    def __init__(self, engine_name, version):
+
+        self.start = time.time()
+        self.record = {
+            'engine': engine_name,
+            'version': version,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'phases': collections.OrderedDict(),
+            }
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager timing the enclosed block as the given phase.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record['phases'][name] = round(time.time() - start, 6)
+
+    def finish(self, result):
+        """
+        Attach the timing record to a launch result and write it to the log,
+        if one is configured.
+        """
+        self.record['total'] = round(time.time() - self.start, 6)
+        result['timings'] = self.record
+
+        log_path = os.environ.get('TK_LAUNCH_TIMING_LOG')
+        if not log_path:
+            return
+        try:
+            with open(log_path, 'a') as fh:
+                fh.write(json.dumps(self.record) + '\n')
+        except (IOError, OSError):
+            pass
+
+
+def get_cache_root():
+    """
+    Return the folder launch caches are persisted in, creating it if needed.
+
+    The location can be overridden with the TK_LAUNCH_CACHE_DIR environment
+    variable, otherwise a folder in the user's home directory is used.
+    """
+    cache_root = os.environ.get('TK_LAUNCH_CACHE_DIR')
+    if not cache_root:
+        cache_root = os.path.join(os.path.expanduser('~'), '.cache', 'tk-config', 'launch')
+
+    ensure_folder_exists(cache_root)
+
+    return cache_root
+
+
+class RezContextCache(object):
+    """
+    On-disk cache of resolved rez contexts.
+
+    Contexts are saved as .rxt files keyed by the requested package list, the
+    platform and the rez version. A sidecar json file stores a fingerprint of
+    the package repositories at the time of the solve, so releasing a new
+    version of any requested family invalidates the entry.
+    """
+
+    # hits and misses of every cache instance in this process
+    hits = 0
+    misses = 0
+
+    def __init__(self, cache_root, logger=None):
+
+        self.cache_root = os.path.join(cache_root, 'rez_contexts')
+        self.logger = logger
+
+        ensure_folder_exists(self.cache_root)
+
+    def get(self, packages):
+        """
+        Return the cached context for the given packages or None on a miss.
+
+        :param list packages: rez package requests
+        """
+        from rez import resolved_context
+
+        key = self.get_key(packages)
+        context_path, meta_path = self._get_paths(key)
+
+        context = None
+        try:
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            if meta.get('fingerprint') == self.get_repository_fingerprint(packages):
+                context = resolved_context.ResolvedContext.load(context_path)
+        except Exception as e:
+            if os.path.exists(meta_path):
+                self._log('Discarding unreadable rez cache entry %s: %s' % (key, e))
+
+        if context is None:
+            RezContextCache.misses += 1
+            self._log('rez context cache miss: %s (hits: %d, misses: %d)' % (key, RezContextCache.hits, RezContextCache.misses))
         else:
-            filter_dict = [
-                ['code', 'is', app_name.title() + " " + version],
-                ['projects', 'is', None]
-                ]
-            packages = sg.find("Software", filter_dict, ['sg_rez'])
-            packages = packages[0]['sg_rez']
+            RezContextCache.hits += 1
+            self._log('rez context cache hit: %s (hits: %d, misses: %d)' % (key, RezContextCache.hits, RezContextCache.misses))
+
+        return context
+
+    def put(self, packages, context):
+        """
+        Store a successfully resolved context for the given packages.
+
+        :param list packages: rez package requests
+        :param context: ResolvedContext instance
+        """
+        if not context.success:
+            return
+
+        key = self.get_key(packages)
+        context_path, meta_path = self._get_paths(key)
+
+        try:
+            context.save(context_path + '.tmp')
+            os.replace(context_path + '.tmp', context_path)
+
+            meta = {
+                'packages': list(packages),
+                'fingerprint': self.get_repository_fingerprint(packages),
+                }
+            with open(meta_path + '.tmp', 'w') as fh:
+                json.dump(meta, fh)
+            os.replace(meta_path + '.tmp', meta_path)
+        except (IOError, OSError) as e:
+            self._log('Could not write rez cache entry %s: %s' % (key, e))
+
+    @staticmethod
+    def get_key(packages):
+        """
+        Return the cache key for a package list on the current platform.
+        """
+        import rez
+
+        data = json.dumps([list(packages), platform.system(), rez.__version__])
+
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_repository_fingerprint(packages):
+        """
+        Return the modification times of each requested package family in
+        every configured package repository.
+
+        Releasing a new version of a family adds a folder to the family
+        folder, which updates its modification time.
+        """
+        from rez.config import config
+
+        families = []
+        for package in packages:
+            match = re.match(r'[~!]?(\w+)', package.strip())
+            if match:
+                families.append(match.group(1))
+
+        fingerprint = []
+        for repository in config.packages_path:
+            for family in sorted(set(families)):
+                try:
+                    mtime = os.stat(os.path.join(repository, family)).st_mtime
+                except OSError:
+                    mtime = None
+                fingerprint.append([repository, family, mtime])
+
+        return fingerprint
+
+    def _get_paths(self, key):
+
+        return (os.path.join(self.cache_root, key + '.rxt'),
+                os.path.join(self.cache_root, key + '.json'))
+
+    def _log(self, msg):
+
+        if self.logger:
+            self.logger.info(msg)
+
+def get_project(tk):
+    """
+    Return the project entity of a toolkit instance.
+
+    The id is read from the pipeline configuration so that no ShotGrid
+    round-trip is needed. Site configurations fall back to the project path.
+    """
+    project_id = tk.pipeline_configuration.get_project_id()
+    if project_id:
+        return {'type': 'Project', 'id': project_id}
+
+    return tk.context_from_path(tk.project_path).project
+
+
+def get_rez_packages(sg, app_name, version, system, project, manifest=None):
+    """
+    Return the rez packages configured on the Software entity of an app.
+
+    A Software entity linked to the project wins over a global one (no
+    projects). Linux launches read sg_rez, other platforms sg_win_rez. The
+    launch manifest is consulted first and ShotGrid only on a miss.
+
+    :returns: list of rez package requests or None
+    """
+    code = app_name.title() + " " + version
+    software = get_manifest_software(manifest, project).get(code)
+    if not software:
+        software = get_software_rez_table(sg, project).get(code, {})
+    entity = software.get('project') or software.get('global')
+    if not entity:
+        return None
+
+    if system == "linux":
+        packages = entity['sg_rez']
     else:
-        filter_dict = [
-            ['code', 'is', app_name.title() + " " + version],
-            ['projects', 'in', project]
-            ]
-        packages = sg.find("Software", filter_dict, ['sg_win_rez'])
-        if packages : 
-            packages =  packages[0]['sg_win_rez']
-        else:
-            filter_dict = [
-                ['code', 'is', app_name.title() + " " + version],
-                ['projects', 'is', None]
-                ]
-            packages = sg.find("Software", filter_dict, ['sg_win_rez'])
-            packages = packages[0]['sg_win_rez']
+        packages = entity['sg_win_rez']
 
     if packages:
         packages = [ x for x in packages.split(",")] 
@@ -144,6 +470,197 @@ def get_rez_packages(sg, app_name, version, system, project):
     return packages
 
 
+def get_software_rez_table(sg, project):
+    """
+    Return the rez fields of every Software entity available to a project.
+
+    Project scoped and global Software entities are fetched together with
+    both platform fields in a single query. The result is shared by all the
+    engines in ENGINES and reused for SOFTWARE_CACHE_TTL seconds.
+
+    :returns: dict of Software code to a dict with 'project' and 'global' keys
+    """
+    project_id = project['id'] if project else None
+    now = time.time()
+
+    with _software_cache_lock:
+        cached = _software_cache.get(project_id)
+        if cached and now - cached[0] < SOFTWARE_CACHE_TTL:
+            return cached[1]
+
+    project_filter = ['projects', 'is', None]
+    if project:
+        project_filter = {
+            'filter_operator': 'any',
+            'filters': [
+                ['projects', 'in', [project]],
+                ['projects', 'is', None],
+                ],
+            }
+
+    table = {}
+    for entity in sg.find("Software", [project_filter], ['code', 'projects', 'sg_rez', 'sg_win_rez']):
+        scope = 'project' if entity.get('projects') else 'global'
+        table.setdefault(entity['code'], {}).setdefault(scope, entity)
+
+    with _software_cache_lock:
+        _software_cache[project_id] = (now, table)
+
+    return table
+
+
+def get_manifest_path(tk):
+    """
+    Return the path of the launch manifest of a toolkit instance.
+
+    TK_LAUNCH_MANIFEST overrides the default location in the config folder.
+    """
+    return os.environ.get('TK_LAUNCH_MANIFEST') or os.path.join(
+        tk.pipeline_configuration.get_config_location(), MANIFEST_NAME)
+
+
+def load_launch_manifest(manifest_path):
+    """
+    Return the contents of a launch manifest, or None if it is missing or
+    was written by a different manifest version.
+
+    Manifests are kept in memory and only re-read when their file changes.
+    """
+    try:
+        mtime = os.stat(manifest_path).st_mtime
+    except OSError:
+        return None
+
+    cached = _manifest_cache.get(manifest_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+
+    _manifest_cache[manifest_path] = (mtime, manifest)
+
+    return manifest
+
+
+def get_manifest_software(manifest, project):
+    """
+    Return the Software rez table of a project as stored in a launch manifest.
+
+    :returns: dict of Software code to a dict with 'project' and 'global' keys
+    """
+    if not manifest:
+        return {}
+
+    table = {}
+    for code, entity in manifest['software'].get('global', {}).items():
+        table[code] = {'global': entity}
+    if project:
+        for code, entity in manifest['software'].get(str(project['id']), {}).items():
+            table.setdefault(code, {})['project'] = entity
+
+    return table
+
+
+def export_launch_manifest(sg, manifest_path):
+    """
+    Write every Software entity and its rez package fields to a launch
+    manifest, grouped by project id ('global' for entities without projects).
+    """
+    software = {}
+    fields = ['code', 'projects', 'sg_rez', 'sg_win_rez']
+    for entity in sg.find("Software", [], fields):
+        rez_fields = {'sg_rez': entity['sg_rez'], 'sg_win_rez': entity['sg_win_rez']}
+        for scope in [str(x['id']) for x in entity['projects'] or []] or ['global']:
+            software.setdefault(scope, {})[entity['code']] = rez_fields
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'software': software,
+        }
+
+    with open(manifest_path + '.tmp', 'w') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    return manifest_path
+
+
+def get_daemon_socket_path():
+    """
+    Return the socket path of the resident launcher daemon.
+
+    TK_LAUNCHER_SOCKET overrides the default location in the cache folder.
+    """
+    return os.environ.get('TK_LAUNCHER_SOCKET') or os.path.join(get_cache_root(), 'launcher.sock')
+
+
+def send_daemon_request(request, timeout=DAEMON_TIMEOUT):
+    """
+    Send a json request to the launcher daemon and return its json reply.
+
+    The daemon acknowledges a request before doing any work. Only the
+    acknowledgement is waited on for at most timeout seconds. Once the
+    request is accepted the reply is waited on for as long as the daemon
+    takes to solve, so a slow solve never makes the hook launch the app a
+    second time.
+
+    :returns: reply dict, or None if no daemon accepted the request or its
+        reply could not be read
+    """
+    socket_path = get_daemon_socket_path()
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return None
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        reader = client.makefile('rb')
+        ack = json.loads(reader.readline().decode('utf-8'))
+        if not isinstance(ack, dict) or not ack.get('accepted'):
+            return None
+        client.settimeout(None)
+        reply = json.loads(reader.readline().decode('utf-8'))
+    except (IOError, OSError, ValueError):
+        return None
+    finally:
+        client.close()
+
+    if not isinstance(reply, dict):
+        return None
+
+    return reply
+
+
+def launch_with_daemon(packages, app_args, app_name):
+    """
+    Ask the launcher daemon to start an app in a rez context it keeps
+    resolved, passing along the launch environment prepared by launchapp.
+
+    :returns: dict with 'command' and 'return_code', or None if the daemon is
+        not running or could not launch the app
+    """
+    reply = send_daemon_request({
+        'packages': packages,
+        'args': app_args,
+        'app_name': app_name,
+        'environ': dict(os.environ),
+        })
+    if not reply or 'error' in reply:
+        return None
+
+    return reply
+
+
 class BaseAdapter(object):
 
     shell_type = 'bash'
@@ -160,6 +677,58 @@ class BaseAdapter(object):
 
     @classmethod
     def get_rez_module_root(cls):
+        """
+        Return the folder the rez python module can be imported from.
+
+        TK_REZ_MODULE_ROOT takes precedence when set. Otherwise the root found
+        by a previous launch is reused for as long as it exists and the rez
+        version installed in it is unchanged, so only a cold miss pays for
+        the rez-env subprocess.
+        """
+        module_path = os.environ.get('TK_REZ_MODULE_ROOT')
+        if module_path:
+            return module_path
+
+        lookup_path = os.path.join(get_cache_root(), 'rez_module_root_%s.json' % cls.shell_type)
+        try:
+            with open(lookup_path) as fh:
+                lookup = json.load(fh)
+            signature = cls.get_rez_module_signature(lookup['path'])
+            if signature and signature == lookup['signature']:
+                return lookup['path']
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+
+        module_path = cls.find_rez_module_root()
+        if module_path:
+            lookup = {
+                'path': module_path,
+                'signature': cls.get_rez_module_signature(module_path),
+                }
+            try:
+                with open(lookup_path, 'w') as fh:
+                    json.dump(lookup, fh)
+            except (IOError, OSError):
+                pass
+
+        return module_path
+
+    @staticmethod
+    def get_rez_module_signature(module_path):
+        """
+        Return a stat based signature of a rez module root, or None if the
+        root or its version file no longer exists.
+        """
+        version_path = os.path.join(module_path, 'rez', 'utils', '_version.py')
+        try:
+            version_stat = os.stat(version_path)
+        except OSError:
+            return None
+
+        return [version_stat.st_mtime, version_stat.st_size]
+
+    @classmethod
+    def find_rez_module_root(cls):
 
         command = cls.get_rez_root_command()
         module_path, stderr = subprocess.Popen(
@@ -167,15 +736,19 @@ class BaseAdapter(object):
         module_path = module_path.strip()
 
         if not stderr and module_path:
+            if not isinstance(module_path, str):
+                module_path = module_path.decode('utf-8')
 
             return module_path
 
         return ''
 
     @classmethod
-    def execute(cls, context, args, command):
+    def execute(cls, context, args, command, parent_environ=None):
 
-        os.environ['USE_SHOTGUN'] = "OK"
+        if parent_environ is None:
+            parent_environ = os.environ
+        parent_environ['USE_SHOTGUN'] = "OK"
 
         if args:
             command += ' {args}'.format(args=args)
@@ -188,7 +761,8 @@ class BaseAdapter(object):
             command = command,
             #command = "gnome-terminal -x bash -c 'python'",
             stdin = False,
-            block = False
+            block = False,
+            parent_environ = parent_environ
             )
         
         return_code = 0
@@ -232,3 +806,28 @@ def get_adapter(system=''):
     except KeyError:
         raise NotImplementedError('system "{system}" is currently unsupported. Options were, "{options}"'
                                   ''.format(system=system, options=list(options)))
+
+
+def main(argv=None):
+    """
+    Export the launch manifest of a pipeline configuration.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Export Software rez packages to the launch manifest so '
+                    'apps can be launched without querying ShotGrid.')
+    parser.add_argument('config_path', help='Root of the pipeline configuration.')
+    parser.add_argument('--output', help='Manifest path. Defaults to the config folder.')
+    args = parser.parse_args(argv)
+
+    user = sgtk.authentication.ShotgunAuthenticator().get_user()
+    sgtk.set_authenticated_user(user)
+    tk = sgtk.sgtk_from_path(args.config_path)
+
+    manifest_path = export_launch_manifest(tk.shotgun, args.output or get_manifest_path(tk))
+    print('Launch manifest written to %s' % manifest_path)
+
+
+if __name__ == '__main__':
+    main()
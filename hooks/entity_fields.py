@@ -0,0 +1,126 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Entity Fields Hook
+
+Read-through cache of ShotGrid entity fields for the publisher. Values are
+kept on the root publish item, so the collector and every publish plugin of
+a publish session share them. Publish hooks get an instance through their
+app::
+
+    entity_fields = self.parent.create_hook_instance("{config}/entity_fields.py")
+    sub_frame = entity_fields.get_fields(item, entity, ["sg_sub_frame"])["sg_sub_frame"]
+
+The first lookup of an entity fetches the requested fields together with
+the PREFETCH_FIELDS of its type in one query. Updates made through update()
+drop the cached values of the entity.
+"""
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+# fields fetched with the first lookup of an entity, by entity type. This is
+# a static table kept by hand: add the fields a plugin reads through
+# get_fields here so that they share the first query of their entity.
+PREFETCH_FIELDS = {
+    "Project": [
+        "sg_color_space",
+        "sg_mov_codec",
+        "sg_out_format",
+        "sg_fps",
+        "sg_mov_colorspace",
+    ],
+    "Shot": ["sg_sub_frame", "sg_resolution"],
+    "HumanUser": ["sg_initials"],
+}
+
+# name of the root item property holding the cached values
+CACHE_PROPERTY = "entity_fields"
+
+
+class EntityFieldsHook(HookBaseClass):
+    """
+    Publish session cache of entity fields.
+    """
+
+    def get_fields(self, item, entity, fields):
+        """
+        Return field values of an entity, querying ShotGrid for the ones
+        not cached yet.
+
+        :param item: Any item of the publish tree
+        :param dict entity: Entity dictionary with "type" and "id" keys
+        :param list fields: Field names
+        :returns: dict of field name to value
+        """
+        cache = self._get_cache(item)
+        key = _get_key(entity["type"], entity["id"])
+        values = cache.setdefault(key, {})
+
+        missing = [x for x in fields if x not in values]
+        if missing:
+            query_fields = set(missing)
+            query_fields.update(
+                x for x in PREFETCH_FIELDS.get(entity["type"], []) if x not in values
+            )
+            result = self.parent.shotgun.find_one(
+                entity["type"], [["id", "is", entity["id"]]], sorted(query_fields)
+            ) or {}
+            values.update((x, result.get(x)) for x in query_fields)
+            self.logger.debug(
+                "Fetched %d fields of %s %s." % (len(query_fields), entity["type"], entity["id"])
+            )
+
+        return dict((x, values[x]) for x in fields)
+
+    def update(self, item, entity_type, entity_id, data, **kwargs):
+        """
+        Update an entity in ShotGrid and drop its cached fields.
+
+        Takes the same arguments as Shotgun.update after the item.
+
+        :param item: Any item of the publish tree
+        :returns: The updated entity returned by ShotGrid
+        """
+        result = self.parent.shotgun.update(entity_type, entity_id, data, **kwargs)
+        self.invalidate(item, entity_type, entity_id)
+
+        return result
+
+    def invalidate(self, item, entity_type=None, entity_id=None):
+        """
+        Drop the cached fields of an entity, or of every entity when no
+        entity is given.
+
+        :param item: Any item of the publish tree
+        :param str entity_type: ShotGrid entity type
+        :param int entity_id: ShotGrid entity id
+        """
+        cache = self._get_cache(item)
+        if entity_type is None:
+            cache.clear()
+        else:
+            cache.pop(_get_key(entity_type, entity_id), None)
+
+    def _get_cache(self, item):
+        """
+        Return the cache dictionary stored on the root item of a publish tree.
+        """
+        while item.parent:
+            item = item.parent
+
+        return item.properties.setdefault(CACHE_PROPERTY, {})
+
+
+def _get_key(entity_type, entity_id):
+
+    return "%s:%s" % (entity_type, entity_id)
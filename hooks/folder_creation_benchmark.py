@@ -0,0 +1,138 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Folder creation benchmark
+
+Builds the folder items of the core/schema shot step subtree for a number
+of shots and steps, and creates them in a scratch folder twice: one exists
+check and mkdir after another as the stock core hook does, and with the
+process_folder_creation core hook of this config. A second pass over the
+same items measures the cost when everything already exists. --latency
+adds a delay to every file system call to approximate network storage::
+
+    python folder_creation_benchmark.py --shots 500 --steps 10 --latency 0.002
+"""
+
+import os
+import sys
+import time
+import types
+import shutil
+import logging
+import argparse
+import tempfile
+import importlib.util
+
+CONFIG_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STEP_SCHEMA = os.path.join(CONFIG_ROOT, "core", "schema", "project", "seq", "sequence", "shot", "step")
+
+
+def get_items(root, shots, steps):
+    """
+    Return folder items for every shot step folder of the schema.
+    """
+    step_folders = [""]
+    for folder, dirs, _ in os.walk(STEP_SCHEMA):
+        for name in dirs:
+            step_folders.append(os.path.relpath(os.path.join(folder, name), STEP_SCHEMA))
+
+    items = []
+    for shot in range(shots):
+        sequence = "s%03d" % (shot // 50)
+        shot_path = os.path.join(root, "seq", sequence, "%s_%04d" % (sequence, shot * 10))
+        items.append({"action": "entity_folder", "path": shot_path})
+        for step in range(steps):
+            step_path = os.path.join(shot_path, "step%02d" % step)
+            for folder in step_folders:
+                items.append({"action": "folder", "path": os.path.join(step_path, folder)})
+
+    return items
+
+
+def create_sequentially(items):
+    """
+    Create folders the way the stock tk-core hook does.
+    """
+    locations = []
+    for item in items:
+        if not os.path.exists(item["path"]):
+            os.makedirs(item["path"], 0o777)
+            locations.append(item["path"])
+
+    return locations
+
+
+def add_latency(delay):
+    """
+    Slow down the file system calls used to check and create folders.
+    """
+    def slow(func):
+        def wrapper(*args, **kwargs):
+            time.sleep(delay)
+            return func(*args, **kwargs)
+        return wrapper
+
+    os.mkdir = slow(os.mkdir)
+    os.scandir = slow(os.scandir)
+    os.stat = slow(os.stat)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmark schema folder creation.")
+    parser.add_argument("--shots", type=int, default=500, help="Number of shots.")
+    parser.add_argument("--steps", type=int, default=10, help="Steps per shot.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each file system call.")
+    args = parser.parse_args(argv)
+
+    class Hook(object):
+
+        def __init__(self):
+
+            self.logger = logging.getLogger("folder_creation_benchmark")
+
+    tank = types.ModuleType("tank")
+    tank.Hook = Hook
+    sys.modules.setdefault("tank", tank)
+    spec = importlib.util.spec_from_file_location(
+        "process_folder_creation",
+        os.path.join(CONFIG_ROOT, "core", "hooks", "process_folder_creation.py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    if args.latency:
+        add_latency(args.latency)
+
+    work_dir = tempfile.mkdtemp(prefix="folder_creation_benchmark_")
+    try:
+        runs = [
+            ("sequential", lambda items: create_sequentially(items)),
+            ("batched", lambda items: module.ProcessFolderCreation().execute(items, False)),
+        ]
+        for name, create in runs:
+            items = get_items(os.path.join(work_dir, name), args.shots, args.steps)
+
+            start = time.time()
+            created = create(items)
+            cold = time.time() - start
+
+            start = time.time()
+            create(items)
+            warm = time.time() - start
+
+            print("%-10s %d items, %d created: %.3fs, rerun %.3fs" % (name, len(items), len(created), cold, warm))
+    finally:
+        shutil.rmtree(work_dir, True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Frame Sequence Hook
+
+Batch version of Template.apply_fields for frame sequences. The part of the
+path that does not depend on the frame is resolved once and every frame is
+then formatted into it, instead of evaluating the whole template per
+frame. Hooks get an instance through their app::
+
+    sequence = self.parent.create_hook_instance("{config}/frame_sequence.py")
+    paths = sequence.apply_fields_to_frames(template, fields, range(1001, 1101))
+"""
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class FrameSequenceHook(HookBaseClass):
+    """
+    Frame range aware template evaluation.
+    """
+
+    def apply_fields_to_frames(self, template, fields, frames, frame_key="SEQ"):
+        """
+        Return the path of every frame of a sequence template.
+
+        :param template: Template with a sequence key
+        :param dict fields: Fields for every key but the frame key
+        :param frames: Iterable of frame numbers
+        :param str frame_key: Name of the sequence key
+        :returns: list of paths, in the order of frames
+        """
+        head, spec, tail = self._split_template(template, fields, frame_key)
+        if not spec:
+            return [head] * len(list(frames))
+
+        return [head + spec % frame + tail for frame in frames]
+
+    def _split_template(self, template, fields, frame_key):
+        """
+        Resolve a template with a frame spec in place of the frame number and
+        return the parts before and after it together with the spec.
+        """
+        format_spec = template.keys[frame_key].format_spec or ""
+        spec = "%" + format_spec + "d"
+
+        fields = dict(fields)
+        fields[frame_key] = spec
+        path = template.apply_fields(fields)
+
+        head, found, tail = path.rpartition(spec)
+        if not found:
+            return path, "", ""
+
+        return head, spec, tail
@@ -0,0 +1,217 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Launch path benchmark
+
+Drives AppLaunch.execute from app_launch.py against stubbed sgtk, ShotGrid
+and rez modules with configurable latencies, and prints the per-phase
+timings each launch reports. Needs neither a ShotGrid site nor rez::
+
+    python launch_benchmark.py --runs 20 --sg-latency 0.2 --solve-time 1.5
+"""
+
+import io
+import os
+import sys
+import time
+import types
+import shutil
+import logging
+import argparse
+import tempfile
+import contextlib
+import collections
+
+
+class FakeShotgun(object):
+    """
+    Answers Software queries from a fixed table after a simulated latency.
+    """
+
+    def __init__(self, latency):
+
+        self.latency = latency
+        self.calls = 0
+        self.software = [
+            {'type': 'Software', 'id': 1, 'code': 'Maya 2022', 'projects': [],
+             'sg_rez': 'maya-2022,mtoa', 'sg_win_rez': 'maya-2022,mtoa'},
+            {'type': 'Software', 'id': 2, 'code': 'Nuke 13.2', 'projects': [{'type': 'Project', 'id': 1}],
+             'sg_rez': 'nuke-13.2', 'sg_win_rez': 'nuke-13.2'},
+            ]
+
+    def find(self, entity_type, filters, fields):
+
+        self.calls += 1
+        time.sleep(self.latency)
+
+        return [dict(x) for x in self.software]
+
+
+class FakeResolvedContext(object):
+    """
+    Stands in for rez.resolved_context.ResolvedContext.
+    """
+
+    solve_time = 0.0
+
+    def __init__(self, packages):
+
+        time.sleep(self.solve_time)
+        self.packages = packages
+        self.success = True
+
+    def save(self, path):
+
+        with open(path, 'w') as fh:
+            fh.write(','.join(self.packages))
+
+    @classmethod
+    def load(cls, path):
+
+        context = cls.__new__(cls)
+        with open(path) as fh:
+            context.packages = fh.read().split(',')
+        context.success = True
+
+        return context
+
+    def execute_shell(self, **kwargs):
+
+        return None
+
+    def print_info(self, **kwargs):
+
+        pass
+
+
+def install_stubs(rez_root, solve_time):
+    """
+    Register stub tank, sgtk and rez modules so app_launch can be imported.
+    """
+
+    class Hook(object):
+
+        def __init__(self, tk):
+
+            self.tank = tk
+            self.logger = logging.getLogger('launch_benchmark')
+
+    def ensure_folder_exists(path):
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    tank = types.ModuleType('tank')
+    tank.Hook = Hook
+    sgtk = types.ModuleType('sgtk')
+    sgtk.Hook = Hook
+    sgtk_util = types.ModuleType('sgtk.util')
+    sgtk_filesystem = types.ModuleType('sgtk.util.filesystem')
+    sgtk_filesystem.ensure_folder_exists = ensure_folder_exists
+    sgtk.util = sgtk_util
+    sgtk_util.filesystem = sgtk_filesystem
+
+    FakeResolvedContext.solve_time = solve_time
+    rez = types.ModuleType('rez')
+    rez.__version__ = '0.0.0'
+    rez_resolved_context = types.ModuleType('rez.resolved_context')
+    rez_resolved_context.ResolvedContext = FakeResolvedContext
+    rez_config = types.ModuleType('rez.config')
+    rez_config.config = types.SimpleNamespace(packages_path=[rez_root])
+    rez.resolved_context = rez_resolved_context
+    rez.config = rez_config
+
+    sys.modules.update({
+        'tank': tank,
+        'sgtk': sgtk,
+        'sgtk.util': sgtk_util,
+        'sgtk.util.filesystem': sgtk_filesystem,
+        'rez': rez,
+        'rez.resolved_context': rez_resolved_context,
+        'rez.config': rez_config,
+        })
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Benchmark the app_launch hook launch path.')
+    parser.add_argument('--runs', type=int, default=10, help='Launches per scenario.')
+    parser.add_argument('--sg-latency', type=float, default=0.1, help='Seconds per ShotGrid query.')
+    parser.add_argument('--solve-time', type=float, default=0.5, help='Seconds per rez solve.')
+    parser.add_argument('--engine', default='tk-maya', help='Engine to launch.')
+    parser.add_argument('--version', default='2022', help='Software version to launch.')
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='launch_benchmark_')
+    try:
+        rez_root = os.path.join(work_dir, 'packages')
+        os.makedirs(rez_root)
+        os.environ['TK_LAUNCH_CACHE_DIR'] = os.path.join(work_dir, 'cache')
+        os.environ['TK_REZ_MODULE_ROOT'] = rez_root
+        os.environ['TK_LAUNCHER_SOCKET'] = os.path.join(work_dir, 'no_daemon.sock')
+        os.environ['TK_LAUNCH_TIMING_LOG'] = os.path.join(work_dir, 'timings.jsonl')
+        os.environ['TK_LAUNCH_MANIFEST'] = os.path.join(work_dir, 'launch_manifest.json')
+        install_stubs(rez_root, args.solve_time)
+
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import app_launch
+
+        sg = FakeShotgun(args.sg_latency)
+        tk = types.SimpleNamespace(
+            shotgun=sg,
+            project_path=work_dir,
+            pipeline_configuration=types.SimpleNamespace(
+                get_project_id=lambda: 1,
+                get_config_location=lambda: work_dir,
+                ),
+            )
+        hook = app_launch.AppLaunch(tk)
+
+        def clear_caches():
+            app_launch._software_cache.clear()
+            shutil.rmtree(os.environ['TK_LAUNCH_CACHE_DIR'], True)
+
+        def export_manifest():
+            app_launch.export_launch_manifest(sg, os.environ['TK_LAUNCH_MANIFEST'])
+
+        # (name, run once before the scenario, run before every launch)
+        scenarios = [
+            ('cold', None, clear_caches),
+            ('warm', None, None),
+            ('manifest', export_manifest, app_launch._software_cache.clear),
+            ]
+        for name, setup, prepare in scenarios:
+            if setup:
+                setup()
+            phases = collections.OrderedDict()
+            totals = []
+            sg.calls = 0
+            for _ in range(args.runs):
+                if prepare:
+                    prepare()
+                # silence the banners the hook prints on every launch
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = hook.execute('', '', args.version, args.engine)
+                totals.append(result['timings']['total'])
+                for phase, duration in result['timings']['phases'].items():
+                    phases.setdefault(phase, []).append(duration)
+
+            print('%s: %d launches, %d ShotGrid queries, avg total %.4fs' % (
+                name, args.runs, sg.calls, sum(totals) / len(totals)))
+            for phase, durations in phases.items():
+                print('    %-16s avg %.4fs  max %.4fs' % (
+                    phase, sum(durations) / len(durations), max(durations)))
+    finally:
+        shutil.rmtree(work_dir, True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Resident launcher daemon
+
+Keeps rez and sgtk imported and the rez contexts of every engine in
+app_launch.ENGINES resolved for a project, and listens on a local socket.
+The app_launch hook hands launches to it so that a launch only forks and
+execs the app. Run it with tk-core on the PYTHONPATH::
+
+    python launcher_daemon.py /path/to/pipeline/config
+
+and compare launch latency with and without it::
+
+    python launcher_daemon.py /path/to/pipeline/config --benchmark "Maya 2022"
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import subprocess
+import socketserver
+
+import sgtk
+import app_launch
+
+
+class LauncherDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server answering json launch requests from app_launch.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, tk):
+
+        self.tk = tk
+        self.adapter = app_launch.get_adapter(platform.system())
+        self.cache = app_launch.RezContextCache(app_launch.get_cache_root())
+        self.contexts = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, LaunchRequestHandler)
+
+    def get_context(self, packages):
+        """
+        Return the resolved context of a package list, solving it only if it
+        is neither held in memory nor in the on-disk cache.
+
+        Contexts held in memory are checked against the package repository
+        fingerprint on every request, so releasing a new version of any
+        requested family makes the daemon resolve the packages again.
+        """
+        from rez import resolved_context
+
+        key = tuple(packages)
+        fingerprint = self.cache.get_repository_fingerprint(packages)
+        with self.lock:
+            entry = self.contexts.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+
+        context = self.cache.get(packages)
+        if context is None:
+            context = resolved_context.ResolvedContext(packages)
+            self.cache.put(packages, context)
+
+        with self.lock:
+            self.contexts[key] = (fingerprint, context)
+
+        return context
+
+    def prewarm(self):
+        """
+        Resolve the contexts of every Software version of the configured
+        engines for the project.
+        """
+        project = app_launch.get_project(self.tk)
+        manifest = app_launch.load_launch_manifest(app_launch.get_manifest_path(self.tk))
+        table = app_launch.get_manifest_software(manifest, project)
+        if not table:
+            table = app_launch.get_software_rez_table(self.tk.shotgun, project)
+
+        for app_name in sorted(set(app_launch.ENGINES.values())):
+            prefix = app_name.title() + " "
+            for code in sorted(table):
+                if not code.startswith(prefix):
+                    continue
+                packages = app_launch.get_rez_packages(
+                    self.tk.shotgun, app_name, code[len(prefix):], sys.platform, project, manifest)
+                if packages:
+                    context = self.get_context(packages)
+                    print('Pre-resolved %s: %s' % (code, 'ok' if context.success else 'failed'))
+
+
+class LaunchRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles a single json line request. An acknowledgement line is written
+    as soon as the request is read, and the json line reply once the app is
+    launched, so the client knows not to launch it itself.
+    """
+
+    def handle(self):
+
+        try:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+            self.wfile.write(json.dumps({'accepted': True}).encode('utf-8') + b'\n')
+            context = self.server.get_context(request['packages'])
+            if not context.success:
+                raise RuntimeError('rez failed to resolve %s' % request['packages'])
+
+            if request.get('benchmark'):
+                start = time.time()
+                context.execute_shell(command='true', block=True, parent_environ=request['environ'])
+                reply = {'exec_time': time.time() - start}
+            else:
+                reply = self.server.adapter.execute(
+                    context, request['args'], request['app_name'], parent_environ=request['environ'])
+        except Exception as e:
+            reply = {'error': str(e)}
+
+        self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+
+def benchmark(tk, code, runs):
+    """
+    Print cold and warm launch-to-exec latency of a Software version.
+
+    Cold launches import rez and solve in a fresh interpreter, as the hook
+    does without the daemon. Warm launches go through the running daemon.
+    """
+    app_name, version = code.split(" ", 1)
+    project = app_launch.get_project(tk)
+    manifest = app_launch.load_launch_manifest(app_launch.get_manifest_path(tk))
+    packages = app_launch.get_rez_packages(
+        tk.shotgun, app_name.lower(), version, sys.platform, project, manifest)
+    rez_path = app_launch.get_adapter(platform.system()).get_rez_module_root()
+
+    cold_script = (
+        'import sys; sys.path.append(%r); '
+        'from rez.resolved_context import ResolvedContext; '
+        'ResolvedContext(%r).execute_shell(command="true", block=True)' % (rez_path, packages))
+
+    cold, warm = [], []
+    for _ in range(runs):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', cold_script])
+        cold.append(time.time() - start)
+
+        start = time.time()
+        reply = app_launch.send_daemon_request({
+            'packages': packages,
+            'environ': dict(os.environ),
+            'benchmark': True,
+            })
+        if not reply or 'error' in reply:
+            raise RuntimeError('launcher daemon is not available: %s' % reply)
+        warm.append(time.time() - start)
+
+    print('%s, %d runs' % (code, runs))
+    print('cold launch-to-exec: min %.3fs avg %.3fs' % (min(cold), sum(cold) / runs))
+    print('warm launch-to-exec: min %.3fs avg %.3fs' % (min(warm), sum(warm) / runs))
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Resident rez launcher for app_launch.')
+    parser.add_argument('config_path', help='Root of the pipeline configuration.')
+    parser.add_argument('--socket', help='Socket path. Defaults to the launch cache folder.')
+    parser.add_argument('--benchmark', metavar='SOFTWARE',
+                        help='Compare cold and warm launches of a Software code against a running daemon.')
+    parser.add_argument('--runs', type=int, default=5, help='Benchmark iterations.')
+    args = parser.parse_args(argv)
+
+    if args.socket:
+        os.environ['TK_LAUNCHER_SOCKET'] = args.socket
+
+    user = sgtk.authentication.ShotgunAuthenticator().get_user()
+    sgtk.set_authenticated_user(user)
+    tk = sgtk.sgtk_from_path(args.config_path)
+
+    if args.benchmark:
+        benchmark(tk, args.benchmark, args.runs)
+        return
+
+    rez_path = app_launch.get_adapter(platform.system()).get_rez_module_root()
+    if not rez_path:
+        raise EnvironmentError('rez is not installed and could not be automatically found. Cannot continue.')
+    sys.path.append(rez_path)
+
+    server = LauncherDaemon(app_launch.get_daemon_socket_path(), tk)
+    server.prewarm()
+    print('Launcher daemon listening on %s' % server.server_address)
+    try:
+        server.serve_forever()
+    finally:
+        os.remove(server.server_address)
+
+
+if __name__ == '__main__':
+    main()
@@ -43,4 +43,16 @@ class BeforeRegisterCommand(HookBaseClass):
         if software_version.product == "NukeStudio":
             engine_instance_name = "tk-nukestudio"
 
+        # resolve the rez context of the software in the background so the
+        # first launch does not have to wait for the solver. Only the desktop
+        # lives long enough for that, the browser integration processes that
+        # also register launchers exit right away.
+        if self.parent.engine.name == "tk-desktop":
+            self.parent.execute_hook_method(
+                "hook_app_launch",
+                "prefetch",
+                engine_name=engine_instance_name,
+                version=software_version.version,
+            )
+
         return engine_instance_name
@@ -630,11 +630,25 @@ class AfterEffectsCopyRenderPlugin(HookBaseClass):
             }
         )
 
+        render_paths = [sgtk.util.ShotgunPath.normalize(x) for x in render_paths]
+
+        # resolve the publish path of every explicitly numbered frame in one
+        # pass, rather than evaluating the sequence template once per frame.
+        frame_numbers = []
         for each_path in render_paths:
-            # get the path in a normalized state. no trailing separator, separators
-            # are appropriate for current os, no double separators, etc.
-            each_path = sgtk.util.ShotgunPath.normalize(each_path)
+            match = re.search(r'\.(\d{4})\.', each_path)
+            if match:
+                frame_numbers.append(int(match.group(1)))
+        frame_target_paths = {}
+        if frame_numbers:
+            frame_sequence = self.parent.create_hook_instance("{config}/frame_sequence.py")
+            frame_target_paths = dict(zip(
+                frame_numbers,
+                frame_sequence.apply_fields_to_frames(seq_template, fields_from_work_template, frame_numbers)
+            ))
+        created_folders = set()
 
+        for each_path in render_paths:
             # check whether the given path points to a sequence
             is_sequence = self.parent.engine.is_adobe_sequence(each_path)
 
@@ -650,15 +664,16 @@ class AfterEffectsCopyRenderPlugin(HookBaseClass):
                     template.keys["SEQ"].format_spec
                 )
 
-            if match or '%04d' in each_path:
-                if match:
-                    frame_number = match.group(1)
-                    template = seq_template
-                    fields_from_work_template["SEQ"] = int(frame_number)
-
             # build the target file path with formattable frame numbers
-            abstract_target_path = template.apply_fields(fields_from_work_template)
-            ensure_folder_exists(os.path.dirname(abstract_target_path))
+            if match:
+                abstract_target_path = frame_target_paths[int(match.group(1))]
+            else:
+                abstract_target_path = template.apply_fields(fields_from_work_template)
+
+            target_folder = os.path.dirname(abstract_target_path)
+            if target_folder not in created_folders:
+                ensure_folder_exists(target_folder)
+                created_folders.add(target_folder)
 
             # copy the files to the publish location
             target_path = None
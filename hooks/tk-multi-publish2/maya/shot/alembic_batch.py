@@ -0,0 +1,105 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Alembic export shared by the Maya shot publish plugins.
+
+The plugins store the AbcExport job of each item in its "alembic_job"
+property during validation. The first item published exports the jobs of
+every checked item of the publish tree with a single AbcExport command, so
+the scene is evaluated once for all of them instead of once per item. The
+plugins still register a publish for each item.
+"""
+
+import os
+
+import maya.mel as mel
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class AlembicBatchExport(HookBaseClass):
+    """
+    Single pass Alembic export of the items of a publish tree.
+    """
+
+    def export(self, item):
+        """
+        Make sure the Alembic file of an item is exported, exporting every
+        pending item of the publish tree along with it.
+
+        :param item: Item with an "alembic_job" property
+        :raises Exception: If the export of the item failed
+        """
+        if item.properties.get("alembic_exported"):
+            return
+
+        if item.properties.get("alembic_batch_failed"):
+            # the batch failed earlier, export the items one by one so each
+            # of them reports its own error
+            self._run([item])
+            return
+
+        items = [item] + [
+            x for x in self._get_pending_items(item) if x is not item
+        ]
+        try:
+            self._run(items)
+        except Exception as e:
+            if len(items) == 1:
+                raise
+            self.logger.warning(
+                "Batched Alembic export failed, exporting items one by one: %s" % e
+            )
+            for x in items:
+                x.properties["alembic_batch_failed"] = True
+            self._run([item])
+
+    def _run(self, items):
+        """
+        Export the Alembic jobs of the given items with one AbcExport command.
+        """
+        for x in items:
+            self.parent.ensure_folder_exists(os.path.dirname(x.properties["path"]))
+
+        # use AbcExport -help in Maya for more detailed Alembic export help
+        abc_export_cmd = "AbcExport %s" % " ".join(
+            '-j "%s"' % x.properties["alembic_job"] for x in items
+        )
+        self.logger.debug("Executing command: %s" % abc_export_cmd)
+        mel.eval(abc_export_cmd)
+
+        for x in items:
+            x.properties["alembic_exported"] = True
+
+        self.logger.info("Exported %d Alembic caches." % len(items))
+
+    def _get_pending_items(self, item):
+        """
+        Return the checked items of the publish tree with an Alembic job that
+        has not been exported yet, leaving out the ones exported in frame
+        chunks, the cameras, and the ones unchanged since their last publish.
+        """
+        root_item = item
+        while root_item.parent:
+            root_item = root_item.parent
+
+        return [
+            x
+            for x in root_item.descendants
+            if x.properties.get("alembic_job")
+            and not x.properties.get("alembic_exported")
+            and not x.properties.get("alembic_chunks")
+            and not x.properties.get("unchanged_publish")
+            and not x.properties.get("camera_bake")
+            and x.checked
+            and any(task.active for task in x.tasks)
+        ]
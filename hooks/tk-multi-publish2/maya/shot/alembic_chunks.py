@@ -0,0 +1,175 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Frame chunked Alembic export for long shots.
+
+When the "Chunk Size" setting of publish_component_abc.py is set, items
+with a longer frame range are split into chunks of that many frames. Each
+chunk is exported from a snapshot of the scene by its own mayapy process,
+see farm_export_task.py, at most TK_ABC_CHUNK_WORKERS at a time. Every
+chunk but the first one evaluates the "Chunk Overlap" frames before its
+first sample as a pre-roll range of its job, so simulations and euler
+filtering match a single export without writing overlapping samples.
+The chunks are then stitched into one archive, Ogawa unless the output
+profile of the item asks for HDF5, with abcstitcher, or the command set in
+TK_ABC_STITCHER.
+
+The time of every chunk and of the stitch is logged, stored in the
+"alembic_chunk_timings" property of the item and, when
+TK_ABC_CHUNK_TIMING_LOG is set, appended to that file as a JSON line.
+"""
+
+import concurrent.futures
+import json
+import os
+import re
+import time
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class AlembicChunkExport(HookBaseClass):
+    """
+    Parallel export of an Alembic job in frame chunks.
+    """
+
+    def get_chunks(self, start_frame, end_frame, step, chunk_size):
+        """
+        Return the (first, last) sample of every chunk of a frame range, or
+        an empty list if the range should be exported in one go.
+
+        :param int start_frame: First frame of the range
+        :param int end_frame: Last frame of the range
+        :param float step: Sample step
+        :param int chunk_size: Frames per chunk, 0 to never split the range
+        """
+        if chunk_size <= 0 or end_frame - start_frame + 1 <= chunk_size:
+            return []
+
+        chunks = []
+        for first in range(start_frame, end_frame + 1, chunk_size):
+            last = min(first + chunk_size - step, end_frame)
+            chunks.append((first, last))
+
+        return chunks
+
+    def export(self, item):
+        """
+        Export the "alembic_job" of an item in the chunks of its
+        "alembic_chunks" property and stitch them into its "path". Each
+        chunk pre-rolls the "alembic_chunk_overlap" frames before it.
+
+        :param item: Item to export
+        :raises Exception: If a chunk or the stitch failed
+        """
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+        path = item.properties["path"]
+        snapshot = farm_export.get_snapshot(item)
+        self.parent.ensure_folder_exists(os.path.dirname(path))
+
+        overlap = item.properties.get("alembic_chunk_overlap", 0)
+        start_frame = item.properties["alembic_chunks"][0][0]
+        chunk_jobs = []
+        for index, (first, last) in enumerate(item.properties["alembic_chunks"]):
+            chunk_path = "%s.chunk%03d.abc" % (os.path.splitext(path)[0], index)
+            # the first chunk starts where a single export would
+            job = get_chunk_job(
+                item.properties["alembic_job"],
+                first,
+                last,
+                chunk_path,
+                min(overlap, first - start_frame),
+            )
+
+            job_path = farm_export.write_job(
+                snapshot,
+                os.path.basename(chunk_path),
+                {
+                    "snapshot": snapshot,
+                    "command": 'AbcExport -j "%s"' % job,
+                    "plugins": ["AbcExport"],
+                    "publish": None,
+                },
+            )
+            chunk_jobs.append((first, last, chunk_path, farm_export.get_task_command(job_path)))
+
+        timings = []
+        workers = int(os.environ.get("TK_ABC_CHUNK_WORKERS", 4))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(farm_export.run_task, x[3]) for x in chunk_jobs]
+            for (first, last, chunk_path, _), future in zip(chunk_jobs, futures):
+                seconds, returncode, output = future.result()
+                timings.append({"start": first, "end": last, "seconds": round(seconds, 3)})
+                self.logger.info(
+                    "Alembic chunk %s-%s exported in %.1fs" % (first, last, seconds)
+                )
+                if returncode or not os.path.exists(chunk_path):
+                    raise Exception("Failed to export frames %s-%s:\n%s" % (first, last, output))
+
+        chunk_paths = [x[2] for x in chunk_jobs]
+        stitcher = os.environ.get("TK_ABC_STITCHER", "abcstitcher")
+        seconds, returncode, output = farm_export.run_task([stitcher, path] + chunk_paths)
+        if returncode:
+            raise Exception("Failed to stitch the Alembic chunks:\n%s" % output)
+        for chunk_path in chunk_paths:
+            os.remove(chunk_path)
+
+        self.logger.info(
+            "Stitched %d Alembic chunks in %.1fs" % (len(chunk_paths), seconds)
+        )
+        item.properties["alembic_chunk_timings"] = timings
+        item.properties["alembic_exported"] = True
+
+        timing_log = os.environ.get("TK_ABC_CHUNK_TIMING_LOG")
+        if timing_log:
+            with open(timing_log, "a") as fh:
+                fh.write(
+                    json.dumps(
+                        {
+                            "path": path,
+                            "chunks": timings,
+                            "stitch": round(seconds, 3),
+                            "time": time.time(),
+                        }
+                    )
+                    + "\n"
+                )
+
+
+def get_chunk_job(job, first, last, chunk_path, overlap):
+    """
+    Return the AbcExport job exporting the samples of a chunk to its own
+    file.
+
+    The frames of the overlap are evaluated as a pre-roll range, which
+    AbcExport only accepts inside the job, and are not written.
+
+    :param str job: AbcExport job of the whole frame range
+    :param first: First sample of the chunk
+    :param last: Last sample of the chunk
+    :param str chunk_path: Path of the chunk file
+    :param overlap: Frames evaluated before the first sample
+    """
+    frame_range = "-fr %f %f" % (first, last)
+    if overlap > 0:
+        frame_range = "-fr %f %f -pr %s" % (first - overlap, first - 1, frame_range)
+
+    job = re.sub(r"-fr \S+ \S+", lambda x: frame_range, job)
+    job = re.sub(r"-file \S+", lambda x: "-file %s" % chunk_path.replace("\\", "/"), job)
+    if "-dataFormat" not in job:
+        job += " -dataFormat ogawa"
+
+    return job
+
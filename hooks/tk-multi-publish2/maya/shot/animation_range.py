@@ -0,0 +1,73 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Scene animation range shared by the Maya shot publish plugins.
+
+The scene is queried once per publish and the result is kept on the root
+item, each plugin then adds its own "Frame Handles" setting to it. The
+collector and the post phase hook drop it so every publish sees the
+current timeline.
+"""
+
+import maya.cmds as cmds
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+# name of the root item property holding the scene range
+CACHE_PROPERTY = "scene_animation_range"
+
+
+class SceneAnimationRange(HookBaseClass):
+    """
+    Cached animation range of the current scene.
+    """
+
+    def get_range(self, item, handles=0):
+        """
+        Return the frame range to export, the playback range extended by the
+        handles, or 1, 1 if nothing in the scene is animated.
+
+        :param item: Any item of the publish tree
+        :param int handles: Frames added before and after the playback range
+        """
+        root_item = _get_root_item(item)
+        scene_range = root_item.properties.get(CACHE_PROPERTY)
+        if scene_range is None:
+            scene_range = {
+                # a single animation curve is enough to know the scene is
+                # animated, there is no need to list all of them
+                "animated": bool(cmds.ls(type="animCurve", head=1)),
+                "start": int(cmds.playbackOptions(q=True, min=True)),
+                "end": int(cmds.playbackOptions(q=True, max=True)),
+            }
+            root_item.properties[CACHE_PROPERTY] = scene_range
+
+        if not scene_range["animated"]:
+            return 1, 1
+
+        return scene_range["start"] - handles, scene_range["end"] + handles
+
+    def invalidate(self, item):
+        """
+        Drop the cached range so the next lookup queries the scene again.
+
+        :param item: Any item of the publish tree
+        """
+        _get_root_item(item).properties.pop(CACHE_PROPERTY, None)
+
+
+def _get_root_item(item):
+
+    while item.parent:
+        item = item.parent
+
+    return item
@@ -0,0 +1,196 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compare the output profiles of output_profiles.py on a sample scene::
+
+    mayapy benchmark_output_profiles.py <scene> <root> [--profiles default,compact]
+        [--start 1001 --end 1100] [--step 0.25] [--repeat 3] [--json report.json]
+        [--sgtk-path /path/to/tk-core/python]
+
+The Alembic and the USD cache of the root node are exported with the flags
+of publish_component_abc.py and export_to_local.py, once per profile. The
+report gives, for each profile and format, the export wall time, the file
+size, and the time it takes to open the file with USD and read every
+attribute sample, as a downstream application would. Alembic files are
+only read when the USD Alembic plugin is available. Times are the best of
+the repeats.
+
+output_profiles.py imports sgtk, so run it in the pipeline environment or
+pass the tk-core python folder with --sgtk-path.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def main(argv):
+
+    parser = argparse.ArgumentParser(description="Benchmark the Maya cache output profiles.")
+    parser.add_argument("scene", help="Maya scene to export from")
+    parser.add_argument("root", help="Node to export")
+    parser.add_argument("--profiles", help="Comma separated profiles, all of them by default")
+    parser.add_argument("--start", type=float, help="First frame, the playback start by default")
+    parser.add_argument("--end", type=float, help="Last frame, the playback end by default")
+    parser.add_argument("--step", type=float, default=1.0, help="Sample step")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measure")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--sgtk-path", help="tk-core python folder")
+    args = parser.parse_args(argv)
+
+    if args.sgtk_path:
+        sys.path.insert(0, args.sgtk_path)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import output_profiles
+
+    names = args.profiles.split(",") if args.profiles else sorted(output_profiles.PROFILES)
+    profiles = [(x, output_profiles.get_profile(x)) for x in names]
+
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+    try:
+        import maya.cmds as cmds
+        import maya.mel as mel
+
+        for plugin in ("AbcExport", "pxrUsd"):
+            if not cmds.pluginInfo(plugin, query=True, loaded=True):
+                cmds.loadPlugin(plugin)
+
+        cmds.file(args.scene, open=True, force=True)
+        start = args.start if args.start is not None else cmds.playbackOptions(q=True, min=True)
+        end = args.end if args.end is not None else cmds.playbackOptions(q=True, max=True)
+
+        folder = tempfile.mkdtemp(prefix="output_profiles_")
+        report = []
+        try:
+            for name, profile in profiles:
+                abc_path = os.path.join(folder, "%s.abc" % name).replace("\\", "/")
+                usd_path = os.path.join(folder, "%s.usd" % name).replace("\\", "/")
+
+                # the flags of publish_component_abc.py
+                abc_job = " ".join(
+                    [
+                        "-renderableOnly",
+                        "-writeFaceSets",
+                        "-uvWrite",
+                        "-eulerFilter",
+                        "-writeVisibility",
+                        "-sn",
+                        "-step %f" % args.step,
+                        "-fr %f %f" % (start, end),
+                        "-root %s" % args.root,
+                    ]
+                    + output_profiles.get_alembic_args(profile)
+                    + ["-file %s" % abc_path]
+                )
+
+                # the flags of export_to_local.py
+                usd_cmd = 'select -r "%s"; usdExport %s -f "%s"' % (
+                    args.root,
+                    " ".join(
+                        [
+                            '-shd "none"',
+                            '-dms "none"',
+                            "-uvs 1",
+                            "-cls 0",
+                            "-vis 1",
+                            "-mt 0",
+                            "-sl",
+                            "-sn 1",
+                            "-fs %f" % args.step,
+                            "-ft %f" % args.step,
+                            "-fr %f %f" % (start, end),
+                        ]
+                    ),
+                    usd_path,
+                )
+
+                def export_usd():
+                    mel.eval(usd_cmd)
+                    output_profiles.finalize_usd(usd_path, profile)
+
+                for file_format, path, export in (
+                    ("abc", abc_path, lambda: mel.eval('AbcExport -j "%s"' % abc_job)),
+                    ("usd", usd_path, export_usd),
+                ):
+                    result = {
+                        "profile": name,
+                        "format": file_format,
+                        "export": _best_time(export, args.repeat),
+                        "size": os.path.getsize(path),
+                        "load": _load_time(path, args.repeat),
+                    }
+                    report.append(result)
+                    print(_format_row(result))
+                    sys.stdout.flush()
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    finally:
+        maya.standalone.uninitialize()
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+def _best_time(function, repeat):
+    """
+    Return the shortest time of repeated calls to a function.
+    """
+    best = None
+    for _ in range(max(repeat, 1)):
+        start = time.time()
+        function()
+        seconds = time.time() - start
+        best = seconds if best is None else min(best, seconds)
+
+    return round(best, 3)
+
+
+def _load_time(path, repeat):
+    """
+    Return the time it takes to open a cache with USD and read every
+    attribute sample, or None if USD cannot read it.
+    """
+    from pxr import Sdf, Usd
+
+    if not Sdf.FileFormat.FindByExtension(os.path.splitext(path)[1][1:]):
+        return None
+
+    def load():
+        stage = Usd.Stage.Open(path, load=Usd.Stage.LoadAll)
+        for prim in stage.Traverse():
+            for attribute in prim.GetAttributes():
+                for t in attribute.GetTimeSamples() or [Usd.TimeCode.Default()]:
+                    attribute.Get(t)
+
+    return _best_time(load, repeat)
+
+
+def _format_row(result):
+
+    load = "-" if result["load"] is None else "%.3fs" % result["load"]
+    return "%-10s %-4s export %8.3fs  size %12d bytes  load %s" % (
+        result["profile"],
+        result["format"],
+        result["export"],
+        result["size"],
+        load,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
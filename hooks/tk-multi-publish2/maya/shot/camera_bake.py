@@ -0,0 +1,145 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Camera export shared by publish_camera_abc.py and publish_camera_ma.py.
+
+The collector creates an Alembic and a Maya binary item for each shot
+camera. The first of them published bakes the camera once over the union
+of their frame ranges, inside an undo chunk, and writes both files from the
+baked curves before the scene is restored. The rig, constraints and
+expressions driving the camera are evaluated once, and the two files hold
+the same animation.
+"""
+
+import os
+import time
+
+import maya.cmds as cmds
+import maya.mel as mel
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class CameraBake(HookBaseClass):
+    """
+    Single bake export of the files of a shot camera.
+    """
+
+    def export(self, item):
+        """
+        Make sure the file of a camera item is exported, exporting the other
+        pending file of the same camera along with it.
+
+        :param item: Camera item with "name", "path", "file_extension" and
+            "frame_range" properties, and an "alembic_job" one for the
+            Alembic file
+        :raises Exception: If the export failed
+        """
+        if item.properties.get("camera_exported"):
+            return
+
+        items = [item] + [
+            x for x in self._get_pending_items(item) if x is not item
+        ]
+        camera = item.properties["name"]
+        start_frame = min(x.properties["frame_range"][0] for x in items)
+        end_frame = max(x.properties["frame_range"][1] for x in items)
+
+        for x in items:
+            self.parent.ensure_folder_exists(os.path.dirname(x.properties["path"]))
+
+        if not cmds.undoInfo(q=1, state=1):
+            cmds.undoInfo(state=1)
+        cmds.undoInfo(openChunk=True, chunkName="bakecam", infinity=1)
+        try:
+            start = time.time()
+            _fix_camera_shapes(camera)
+            cmds.bakeResults(
+                camera,
+                time=(start_frame, end_frame),
+                hierarchy="below",
+                shape=True,
+                simulation=True,
+                sampleBy=1,
+                disableImplicitControl=True,
+                preserveOutsideKeys=True,
+                minimizeRotation=True,
+            )
+            self.logger.debug(
+                "Baked %s over frames %s-%s in %.1fs"
+                % (camera, start_frame, end_frame, time.time() - start)
+            )
+
+            for x in items:
+                if x.properties["file_extension"] == "abc":
+                    # use AbcExport -help in Maya for more detailed Alembic
+                    # export help
+                    abc_export_cmd = 'AbcExport -j "%s"' % x.properties["alembic_job"]
+                    self.logger.debug("Executing command: %s" % abc_export_cmd)
+                    mel.eval(abc_export_cmd)
+                else:
+                    cmds.select(camera)
+                    cmds.file(
+                        x.properties["path"].replace("\\", "/"),
+                        f=1,
+                        es=1,
+                        op="v=0",
+                        typ="mayaBinary",
+                    )
+        finally:
+            cmds.undoInfo(closeChunk=True)
+            cmds.undo()
+
+        for x in items:
+            x.properties["camera_exported"] = True
+
+        self.logger.info(
+            "Exported %d files of %s from a single bake." % (len(items), camera)
+        )
+
+    def _get_pending_items(self, item):
+        """
+        Return the checked items of the same camera that have not been
+        exported yet. The Alembic item is left out when caches are exported
+        on the farm, see farm_export.py.
+        """
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+        farm_enabled = farm_export.is_enabled()
+
+        return [
+            x
+            for x in item.parent.children
+            if x.properties.get("name") == item.properties["name"]
+            and "frame_range" in x.properties
+            and not x.properties.get("camera_exported")
+            and not (farm_enabled and x.properties.get("file_extension") == "abc")
+            and x.checked
+            and any(task.active for task in x.tasks)
+        ]
+
+
+def _fix_camera_shapes(camera):
+    """
+    Reset the overscan and the 2D pan/zoom of the camera shapes below a
+    transform.
+    """
+    shapes = cmds.listRelatives(camera, ad=1, type="camera", f=True) or []
+    for shape in shapes:
+        cmds.setAttr(shape + '.overscan', 1.0)
+        if cmds.getAttr(shape + '.panZoomEnabled') == True:
+            cmds.setAttr(shape + '.pan', 0.0, 0.0, typ='float2')
+            cmds.setAttr(shape + '.zoom', 1.0)
+            if cmds.getAttr(shape + '.renderPanZoom') == True:
+                cmds.setAttr(shape + '.renderPanZoom', False)
+            cmds.setAttr(shape + '.panZoomEnabled', False)
@@ -0,0 +1,303 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Fingerprint of the shot components published by publish_component_abc.py.
+
+The fingerprint is a hash of everything the cache of a component depends
+on: the topology of its meshes, the world matrix of its transforms, the
+animation curves and time dependent nodes upstream of its nodes, the
+inputs of its deformers, the files read by its history, the version of its
+referenced file, the frame range, the sub frame step and the export flags.
+Attribute values are read on the first frame of the range, so the frame
+the scene is on does not change the fingerprint. It is stored on the
+PublishedFile in the field named by TK_CACHE_FINGERPRINT_FIELD
+(sg_cache_fingerprint by default). When it matches the last publish of the
+component, the previous cache is linked to the new publish path instead of
+being exported again.
+
+Nothing is skipped if the field does not exist on PublishedFile, or for
+components outside of a namespace.
+"""
+
+import array
+import hashlib
+import os
+import re
+import shutil
+import threading
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+# upstream node types whose attribute values change the animation
+ANIMATION_NODE_TYPES = ("pairBlend", "animBlendNodeBase", "animLayer", "constraint", "expression")
+
+FINGERPRINT_FIELD = os.environ.get("TK_CACHE_FINGERPRINT_FIELD", "sg_cache_fingerprint")
+
+# whether the fingerprint field exists, by site
+_field_exists = {}
+_field_exists_lock = threading.Lock()
+
+
+class ComponentFingerprint(HookBaseClass):
+    """
+    Skips the export of components unchanged since their last publish.
+    """
+
+    def check(self, plugin, settings, item):
+        """
+        Compute the fingerprint of a component item and compare it to the
+        last publish of the component.
+
+        Sets the "unchanged_publish" property of the item to the previous
+        PublishedFile when they match, and makes the publish store the new
+        fingerprint.
+
+        :param plugin: Publish plugin of the item
+        :param settings: Settings of the plugin
+        :param item: Item with "name", "frame_range", "sub_frame" and
+            "alembic_job" properties
+        """
+        item.properties.pop("unchanged_publish", None)
+        if not self._has_field():
+            return
+
+        fingerprint = self.compute(item)
+        if fingerprint is None:
+            self.logger.debug(
+                "%s is not in a namespace, it is always exported." % item.properties["name"]
+            )
+            return
+
+        publish_kwargs = item.properties.setdefault("publish_kwargs", {})
+        publish_kwargs.setdefault("sg_fields", {})[FINGERPRINT_FIELD] = fingerprint
+
+        previous = self.parent.shotgun.find_one(
+            "PublishedFile",
+            [
+                ["entity", "is", item.context.entity],
+                ["name", "is", plugin.get_publish_name(settings, item)],
+                ["published_file_type.PublishedFileType.code", "is", plugin.get_publish_type(settings, item)],
+            ],
+            ["path", "version_number", FINGERPRINT_FIELD],
+            order=[{"field_name": "version_number", "direction": "desc"}],
+        )
+        if not previous or previous.get(FINGERPRINT_FIELD) != fingerprint:
+            return
+
+        previous_path = (previous.get("path") or {}).get("local_path")
+        if previous_path and os.path.exists(previous_path):
+            item.properties["unchanged_publish"] = {
+                "id": previous["id"],
+                "path": previous_path,
+                "version_number": previous["version_number"],
+            }
+
+    def compute(self, item):
+        """
+        Return the fingerprint of a component item, or None if the component
+        is not in a namespace.
+
+        :param item: Item with "name", "frame_range", "sub_frame" and
+            "alembic_job" properties
+        """
+        root = item.properties["name"]
+        if not root.rpartition(":")[0]:
+            return None
+
+        digest = hashlib.sha1()
+
+        # the export flags, without the output path
+        job = re.sub(r"-file \S+", "", item.properties["alembic_job"])
+        digest.update(job.encode("utf-8"))
+        digest.update(("%s %s" % tuple(item.properties["frame_range"])).encode("utf-8"))
+        digest.update(("%f" % item.properties["sub_frame"]).encode("utf-8"))
+
+        # mesh topology
+        meshes = cmds.listRelatives(root, allDescendents=True, type="mesh", fullPath=True) or []
+        selection = om.MSelectionList()
+        for mesh in meshes:
+            selection.add(mesh)
+        for index, mesh in enumerate(meshes):
+            counts, ids = om.MFnMesh(selection.getDagPath(index)).getVertices()
+            digest.update(mesh.split("|")[-1].encode("utf-8"))
+            digest.update(array.array("i", counts).tobytes())
+            digest.update(array.array("i", ids).tobytes())
+
+        start_frame = item.properties["frame_range"][0]
+
+        # world matrix of every transform, so moving or scaling the component
+        # without keying it changes the fingerprint
+        transforms = cmds.listRelatives(root, allDescendents=True, type="transform", fullPath=True) or []
+        for node in cmds.ls([root] + transforms, long=True, type="transform"):
+            digest.update(node.split("|")[-1].encode("utf-8"))
+            matrix = cmds.getAttr(node + ".worldMatrix[0]", time=start_frame)
+            digest.update(array.array("d", matrix).tobytes())
+
+        # never empty, ls lists the whole scene for an empty list
+        history = self._get_history(root) or [root]
+
+        # animation curves and time dependent nodes upstream of the component
+        for node in self._get_animation_nodes(history):
+            digest.update(node.encode("utf-8"))
+            if cmds.objectType(node, isAType="animCurve"):
+                for flag in ("timeChange", "valueChange"):
+                    values = cmds.keyframe(node, query=True, **{flag: True}) or []
+                    digest.update(array.array("d", values).tobytes())
+                tangents = cmds.keyTangent(node, query=True, inAngle=True, outAngle=True) or []
+                digest.update(array.array("d", tangents).tobytes())
+                continue
+            if cmds.objectType(node, isAType="expression"):
+                digest.update((cmds.expression(node, query=True, string=True) or "").encode("utf-8"))
+            self._hash_attributes(digest, node, start_frame)
+
+        # inputs of the deformers that are not animated, such as blend shape
+        # weights or deformer envelopes
+        for node in sorted(set(cmds.ls(history, type="geometryFilter"))):
+            digest.update(node.encode("utf-8"))
+            self._hash_attributes(digest, node, start_frame)
+
+        # files read by the history, such as the cache of an AlembicNode
+        for node in sorted(set(cmds.ls(history))):
+            for attr in cmds.listAttr(node, usedAsFilename=True) or []:
+                try:
+                    path = cmds.getAttr("%s.%s" % (node, attr))
+                except (RuntimeError, ValueError):
+                    continue
+                if not path:
+                    continue
+                digest.update(("%s.%s=%s" % (node, attr, path)).encode("utf-8"))
+                if os.path.isfile(path):
+                    digest.update(str(os.path.getmtime(path)).encode("utf-8"))
+
+        # referenced file the component comes from
+        if cmds.referenceQuery(root, isNodeReferenced=True):
+            reference_path = cmds.referenceQuery(root, filename=True, withoutCopyNumber=True)
+            digest.update(reference_path.encode("utf-8"))
+            if os.path.exists(reference_path):
+                digest.update(str(os.path.getmtime(reference_path)).encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def _hash_attributes(self, digest, node, frame):
+        """
+        Add the keyable and channel box scalar attribute values of a node on
+        the given frame to a digest.
+        """
+        attrs = set(cmds.listAttr(node, keyable=True, scalar=True, multi=True) or [])
+        attrs.update(cmds.listAttr(node, channelBox=True, scalar=True, multi=True) or [])
+        for attr in sorted(attrs):
+            try:
+                value = cmds.getAttr("%s.%s" % (node, attr), time=frame)
+            except (RuntimeError, ValueError):
+                continue
+            digest.update(("%s=%r" % (attr, value)).encode("utf-8"))
+
+    def _get_history(self, root):
+        """
+        Return the long names of the nodes upstream of a component
+        hierarchy.
+
+        The history of every DAG node found upstream, such as constraint
+        targets or the joints of a skin, is followed too, so animation
+        driven from outside of the component is included.
+        """
+        visited = set()
+        descendants = cmds.listRelatives(root, allDescendents=True, fullPath=True) or []
+        pending = set(cmds.ls([root] + descendants, long=True))
+        history = set()
+        while pending:
+            visited.update(pending)
+            found = set(cmds.ls(cmds.listHistory(list(pending), pruneDagObjects=True) or [], long=True))
+            history.update(found)
+            sources = cmds.listConnections(
+                list(found | pending), source=True, destination=False, shapes=True
+            ) or []
+            pending = set(cmds.ls(list(found) + sources, dagObjects=True, long=True)) - visited
+            history.update(cmds.ls(sources, long=True))
+
+        return sorted(history)
+
+    def _get_animation_nodes(self, history):
+        """
+        Return the animation curves, time dependent nodes and animation
+        blending nodes of a history, sorted by name.
+        """
+        time_nodes = cmds.ls(type="time")
+        time_dependent = set(
+            cmds.listConnections(time_nodes, source=False, destination=True) or []
+        ) if time_nodes else set()
+
+        nodes = []
+        for node in cmds.ls(history):
+            if (
+                node in time_dependent
+                or cmds.objectType(node, isAType="animCurve")
+                or any(cmds.objectType(node, isAType=x) for x in ANIMATION_NODE_TYPES)
+            ):
+                nodes.append(node)
+
+        return sorted(set(nodes))
+
+    def relink(self, item):
+        """
+        Link the cache of the previous publish of an unchanged component to
+        its new publish path, and record it in the skip report.
+
+        :param item: Item with an "unchanged_publish" property
+        """
+        previous = item.properties["unchanged_publish"]
+        path = item.properties["path"]
+
+        if os.path.normpath(previous["path"]) != os.path.normpath(path):
+            self.parent.ensure_folder_exists(os.path.dirname(path))
+            if os.path.exists(path):
+                os.remove(path)
+            try:
+                os.link(previous["path"], path)
+            except OSError:
+                shutil.copy2(previous["path"], path)
+
+        item.properties["alembic_exported"] = True
+
+        self.logger.info(
+            "%s is unchanged since version %s, linked its cache instead of "
+            "exporting it." % (item.properties["name"], previous["version_number"])
+        )
+
+        root_item = item
+        while root_item.parent:
+            root_item = root_item.parent
+        root_item.properties.setdefault("fingerprint_skipped", []).append(
+            item.properties["name"]
+        )
+
+    def _has_field(self):
+        """
+        Return True if the fingerprint field exists on PublishedFile.
+        """
+        sg = self.parent.shotgun
+        with _field_exists_lock:
+            if sg.base_url not in _field_exists:
+                try:
+                    sg.schema_field_read("PublishedFile", FINGERPRINT_FIELD)
+                    _field_exists[sg.base_url] = True
+                except Exception:
+                    self.logger.debug(
+                        "PublishedFile has no %s field, component "
+                        "fingerprints are disabled." % FINGERPRINT_FIELD
+                    )
+                    _field_exists[sg.base_url] = False
+
+        return _field_exists[sg.base_url]
@@ -8,26 +8,30 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import concurrent.futures
+import json
 import os
 import re
 import pprint
+import time
 import maya.cmds as cmds
 import maya.mel as mel
 from pxr import Kind, Sdf, Usd, UsdGeom
 import sgtk
+from tank_vendor import six
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
 
 class MayaSessionToTractorPlugin(HookBaseClass):
     """
-    Plugin for publishing an open maya session.
+    Plugin for publishing the USD caches of the shot components.
 
     This hook relies on functionality found in the base file publisher hook in
     the publish2 app and should inherit from it in the configuration. The hook
     setting for this plugin should look something like this::
 
-        hook: "{self}/publish_file.py:{engine}/tk-multi-publish2/basic/publish_session.py"
+        hook: "{self}/publish_file.py:{config}/tk-multi-publish2/maya/shot/farm_export_plugin.py:{config}/tk-multi-publish2/maya/shot/export_to_local.py"
 
     """
 
@@ -41,10 +45,10 @@ class MayaSessionToTractorPlugin(HookBaseClass):
         """
 
         return """
-        <p>This plugin publishes session geometry for the current session. Any
-        session geometry will be exported to the path defined by this plugin's
-        configured "Publish Template" setting. The plugin will fail to validate
-        if the "AbcExport" plugin is not enabled or cannot be found.</p>
+        <p>This plugin publishes the USD cache of a shot component. The
+        component is exported to the path defined by this plugin's configured
+        "Publish Template" setting, and is referenced by the USD assembly of
+        the shot.</p>
         """
 
     @property
@@ -67,7 +71,33 @@ class MayaSessionToTractorPlugin(HookBaseClass):
         part of its environment configuration.
         """
         # inherit the settings from the base publish plugin
-        base_settings = {}
+        base_settings = super(MayaSessionToTractorPlugin, self).settings or {}
+
+        # settings specific to this class
+        maya_publish_settings = {
+            "Publish Template": {
+                "type": "template",
+                "default": None,
+                "description": "Template path for published work files. Should"
+                               "correspond to a template defined in "
+                               "templates.yml.",
+            },
+            "Frame Handles": {
+                "type": "int",
+                "default": 20,
+                "description": "Number of frames exported before and after "
+                               "the playback range.",
+            },
+            "Output Profile": {
+                "type": "str",
+                "default": "default",
+                "description": "Output format profile of the USD files, see "
+                               "output_profiles.py.",
+            },
+        }
+
+        # update the base settings
+        base_settings.update(maya_publish_settings)
 
         return base_settings
 
@@ -80,7 +110,7 @@ class MayaSessionToTractorPlugin(HookBaseClass):
         accept() method. Strings can contain glob patters such as *, for example
         ["maya.*", "file.maya"]
         """
-        return ["maya.session.shot.component.usd"]
+        return ["maya.session.shot.component.usd", "maya.session.shot.set.usd"]
 
     def accept(self, settings, item):
         """
@@ -108,8 +138,39 @@ class MayaSessionToTractorPlugin(HookBaseClass):
         :returns: dictionary with boolean keys accepted, required and enabled
         """
 
+        accepted = True
+        publisher = self.parent
+        template_name = settings["Publish Template"].value
+
+        # ensure a work file template is available on the parent item
+        work_template = item.parent.parent.properties.get("work_template")
+        if not work_template:
+            self.logger.debug(
+                "A work template is required for the session item in order to "
+                "publish component caches. Not accepting the component item."
+            )
+            accepted = False
+
+        # ensure the publish template is defined and valid
+        publish_template = publisher.get_template_by_name(template_name)
+        if not publish_template:
+            self.logger.debug(
+                "The valid publish template could not be determined for the "
+                "component item. Not accepting the item."
+            )
+            accepted = False
+
+        # we've validated the publish template. add it to the item properties
+        # for use in subsequent methods
+        item.properties["publish_template"] = publish_template
+
+        # because a publish template is configured, disable context change. This
+        # is a temporary measure until the publisher handles context switching
+        # natively.
+        item.context_change_allowed = False
+
         return {
-            "accepted": True,
+            "accepted": accepted,
             "checked": True
         }
 
@@ -161,7 +222,58 @@ class MayaSessionToTractorPlugin(HookBaseClass):
         if "version" in work_fields:
             item.properties["publish_version"] = work_fields["version"]
 
-        return True
+        # output format of the USD files, see output_profiles.py
+        output_profiles = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/output_profiles.py"
+        )
+        try:
+            item.properties["output_profile"] = output_profiles.get_profile(
+                settings["Output Profile"].value)
+        except Exception as e:
+            self.logger.error(str(e))
+            raise
+
+        # farm tasks export with the default usdExport flags, the profile
+        # is only applied to exports made in this session
+        profile = item.properties["output_profile"]
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+        if farm_export.is_enabled() and (
+            profile["usd_format"] != "usdc" or profile["decimate_static"]
+        ):
+            error_msg = (
+                "The output profile %s is not applied to farm exports. Use "
+                "the default profile or unset TK_MAYA_FARM_EXPORT." % settings["Output Profile"].value
+            )
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        # when the scene has sub-components, the caches are written to a
+        # folder named after the publish path, one file per component, see
+        # sub_components.py
+        sub_component_index = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/sub_components.py"
+        )
+        if sub_component_index.get_sub_components(item):
+            item.properties["path"] = self._get_sub_component_path(
+                item.properties["name"], item)
+            item.properties["publish_path"] = item.properties["path"]
+
+        # the path the cache is exported to, also referenced by the shot
+        # assembly, see publish_shot_usd.py
+        item.properties["usd_export_path"] = item.properties["path"]
+
+        # a component nested in another component of the shot is part of
+        # that component's cache
+        item.properties["usd_parent_component"] = sub_component_index.get_parent_component(item)
+
+        # build the usdExport command of the item
+        item.properties["usd_export_command"] = self._get_usd_export_command(settings, item)
+        item.properties.pop("usd_exported", None)
+
+        # run the base class validation
+        return super(MayaSessionToTractorPlugin, self).validate(settings, item)
 
 
     def publish(self, settings, item):
@@ -173,8 +285,13 @@ class MayaSessionToTractorPlugin(HookBaseClass):
             instances.
         :param item: Item to process
         """
-        
-        publisher = self.parent
+
+        parent_component = item.properties.get("usd_parent_component")
+        if parent_component:
+            self.logger.info(
+                "%s is exported with %s." % (item.properties["name"], parent_component)
+            )
+            return
 
         # get the path to create and publish
         publish_path = item.properties["path"]
@@ -183,6 +300,32 @@ class MayaSessionToTractorPlugin(HookBaseClass):
         publish_folder = os.path.dirname(publish_path)
         self.parent.ensure_folder_exists(publish_folder)
 
+        # exported and registered by a mayapy task when farm export is
+        # enabled, see farm_export_plugin.py. The files are left as usdExport
+        # writes them, the task only runs MEL
+        if self._submit_farm_export(
+            settings,
+            item,
+            item.properties["usd_export_command"],
+            ["pxrUsd"],
+        ):
+            return
+
+        # the cache is exported together with the other USD items of the
+        # publish
+        self._export(item)
+
+        # register the cache, the assembly of the shot depends on it
+        super(MayaSessionToTractorPlugin, self).publish(settings, item)
+
+    def _get_usd_export_command(self, settings, item):
+        """
+        Return the MEL command exporting the cache of an item.
+
+        :param settings: Settings of the plugin
+        :param item: Item to process
+        """
+
         # set the alembic args that make the most sense when working with Mari.
         # These flags will ensure the export of an USD file that contains
         # all visible geometry from the current scene together with UV's and
@@ -205,78 +348,196 @@ class MayaSessionToTractorPlugin(HookBaseClass):
 
 
         # find the animated frame range to use:
-        start_frame, end_frame = _find_scene_animation_range()
+        animation_range = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/animation_range.py"
+        )
+        start_frame, end_frame = animation_range.get_range(
+            item, settings["Frame Handles"].value)
         if start_frame and end_frame:
             usd_args.append("-fr %d %d" % (start_frame, end_frame))
 
-        # Set the output path: 
-        # Note: The AbcExport command expects forward slashes!
-
-        sub_components = [ x for x in cmds.ls(allPaths=1,ca=0,transforms=1,l=1) 
-        if cmds.listRelatives(x,p=1) 
-        and cmds.attributeQuery("Meshtype",node=x,exists=1) 
-        and cmds.getAttr(x+".Meshtype", asString=True) == "component"]
-        
-        
+        # Set the output path:
+        # Note: The usdExport command expects forward slashes!
+        usd_args.append('-f "%s"' % item.properties["path"].replace("\\", "/"))
 
+        # build the export command.  Note, use usdExport -help in Maya for
+        # more detailed USD export help
+        return 'select -r "%s"; usdExport %s' % (item.properties['name'], " ".join(usd_args))
 
+    def _get_sub_component_path(self, sub_component, item):
+        """
+        Return the path of the cache of a component in the folder named after
+        the publish path of the item.
 
-        if not sub_components:
+        :param str sub_component: Name of the component node
+        :param item: Item with a "path" property
+        """
+        path = os.path.splitext(item.properties["path"])[0]
+        path = os.path.join(path, sub_component.replace("|", "_") + ".usd")
 
-            usd_args.append('-f "%s"' % publish_path.replace("\\", "/"))
+        return path
 
-        # build the export command.  Note, use AbcExport -help in Maya for
-        # more detailed USD export help
+    def _export(self, item):
+        """
+        Make sure the cache of an item is exported, exporting every pending
+        USD item of the publish tree along with it.
 
-            usd_export_cmd = ("usdExport %s" % " ".join(usd_args))
+        A single item is exported in this session, more items are exported
+        in parallel from a snapshot of the scene, see _export_parallel.
 
-        # ...and execute it:
-            cmds.select(item.properties['name'])
-            print(usd_export_cmd)
-            mel.eval(usd_export_cmd)
+        :param item: Item with a "usd_export_command" property
+        :raises Exception: If the export of an item failed
+        """
+        if item.properties.get("usd_exported"):
             return
-        else:
 
-            asset_usd_path = self._get_sub_component_path(item.properties['name'],item)
-            usd_args.append('-f "%s"' % asset_usd_path.replace("\\", "/"))
-            usd_export_cmd = ("usdExport %s" % " ".join(usd_args))
-            cmds.select(item.properties['name'])
-            mel.eval(usd_export_cmd)
-            
-            return
+        items = [item] + [
+            x for x in self._get_pending_items(item) if x is not item
+        ]
+        for x in items:
+            self.parent.ensure_folder_exists(os.path.dirname(x.properties["path"]))
 
-    
+        if len(items) > 1:
+            self._export_parallel(items)
+        else:
+            # ...and execute it:
+            self.logger.debug("Executing command: %s" % item.properties["usd_export_command"])
+            mel.eval(item.properties["usd_export_command"])
+
+        output_profiles = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/output_profiles.py"
+        )
+        for x in items:
+            output_profiles.finalize_usd(x.properties["path"], x.properties["output_profile"])
+            x.properties["usd_exported"] = True
+
+    def _get_pending_items(self, item):
+        """
+        Return the checked items of the publish tree with a USD export that
+        has not run yet, leaving out the components exported with the
+        component they are nested in.
+        """
+        root_item = item
+        while root_item.parent:
+            root_item = root_item.parent
+
+        return [
+            x
+            for x in root_item.descendants
+            if x.properties.get("usd_export_command")
+            and not x.properties.get("usd_exported")
+            and not x.properties.get("usd_parent_component")
+            and x.checked
+            and any(task.active for task in x.tasks)
+        ]
+
+    def _export_parallel(self, items):
+        """
+        Export the caches of several items from a snapshot of the scene,
+        each by its own mayapy process, at most TK_USD_EXPORT_WORKERS at a
+        time.
 
+        The time of every export is logged with the speed-up over exporting
+        them one after the other in this session, stored in the
+        "usd_export_timings" property of the first item and, when
+        TK_USD_EXPORT_TIMING_LOG is set, appended to that file as a JSON line.
 
-    def _get_sub_component_path(self,sub_component,item):
-        path = os.path.splitext(item.properties["path"])[0]
-        path = os.path.join(path,sub_component.replace("|","_")+'.usd')
-        
-        return path
+        :param list items: Items with a "usd_export_command" property
+        :raises Exception: If an export failed
+        """
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+
+        # the session only saves the scene, the workers export it
+        snapshot = farm_export.get_snapshot(items[0])
+
+        tasks = []
+        for x in items:
+            job_path = farm_export.write_job(
+                snapshot,
+                os.path.basename(x.properties["path"]),
+                {
+                    "snapshot": snapshot,
+                    "command": x.properties["usd_export_command"],
+                    "plugins": ["pxrUsd"],
+                    "publish": None,
+                },
+            )
+            tasks.append(farm_export.get_task_command(job_path))
+
+        start = time.time()
+        timings = []
+        workers = int(os.environ.get("TK_USD_EXPORT_WORKERS", 4))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(farm_export.run_task, x) for x in tasks]
+            for x, future in zip(items, futures):
+                node = x.properties["name"]
+                seconds, returncode, output = future.result()
+                if returncode or not os.path.exists(x.properties["path"]):
+                    raise Exception("Failed to export %s:\n%s" % (node, output))
+
+                # time of the export alone, without starting mayapy and
+                # opening the snapshot
+                match = re.search(r"Export time: ([\d.]+)s", output)
+                export_seconds = float(match.group(1)) if match else seconds
+                timings.append(
+                    {
+                        "node": node,
+                        "seconds": round(seconds, 3),
+                        "export": round(export_seconds, 3),
+                    }
+                )
+                self.logger.debug("Exported %s in %.1fs" % (node, export_seconds))
+        wall_seconds = time.time() - start
+
+        # exporting one after the other in this session would take the sum
+        # of the export times
+        serial_seconds = sum(x["export"] for x in timings)
+        self.logger.info(
+            "Exported %d USD caches in %.1fs with %d workers, %.1fs one "
+            "after the other (%.1fx)"
+            % (
+                len(timings),
+                wall_seconds,
+                workers,
+                serial_seconds,
+                serial_seconds / wall_seconds if wall_seconds else 0,
+            )
+        )
+        items[0].properties["usd_export_timings"] = timings
+
+        timing_log = os.environ.get("TK_USD_EXPORT_TIMING_LOG")
+        if timing_log:
+            with open(timing_log, "a") as fh:
+                fh.write(
+                    json.dumps(
+                        {
+                            "workers": workers,
+                            "items": timings,
+                            "wall": round(wall_seconds, 3),
+                            "serial": round(serial_seconds, 3),
+                            "time": time.time(),
+                        }
+                    )
+                    + "\n"
+                )
 
     def finalize(self, settings, item):
-        pass
-
-
-def _find_scene_animation_range():
-    """
-    Find the animation range from the current scene.
-    """
-    # look for any animation in the scene:
-    animation_curves = cmds.ls(typ="animCurve")
-
-    # if there aren't any animation curves then just return
-    # a single frame:
-    if not animation_curves:
-        return 1, 1
+        """
+        Execute the finalization pass. This pass executes once all the publish
+        tasks have completed, and can for example be used to version up files.
 
-    # something in the scene is animated so return the
-    # current timeline.  This could be extended if needed
-    # to calculate the frame range of the animated curves.
-    start = int(cmds.playbackOptions(q=True, min=True)) - 20
-    end = int(cmds.playbackOptions(q=True, max=True)) + 20
+        :param settings: Dictionary of Settings. The keys are strings, matching
+            the keys returned in the settings property. The values are `Setting`
+            instances.
+        :param item: Item to process
+        """
+        if item.properties.get("usd_parent_component"):
+            # nothing was published for the item
+            return
 
-    return start, end
+        super(MayaSessionToTractorPlugin, self).finalize(settings, item)
 
 
 def _session_path():
@@ -286,8 +547,8 @@ def _session_path():
     """
     path = cmds.file(query=True, sn=True)
 
-    if isinstance(path, unicode):
-        path = path.encode("utf-8")
+    if path is not None:
+        path = six.ensure_str(path)
 
     return path
 
@@ -295,3 +556,27 @@ def _session_path():
 
         
 
+
+def _get_save_as_action():
+    """
+    Simple helper for returning a log action dict for saving the session
+    """
+
+    engine = sgtk.platform.current_engine()
+
+    # default save callback
+    callback = cmds.SaveScene
+
+    # if workfiles2 is configured, use that for file save
+    if "tk-multi-workfiles2" in engine.apps:
+        app = engine.apps["tk-multi-workfiles2"]
+        if hasattr(app, "show_file_save_dlg"):
+            callback = app.show_file_save_dlg
+
+    return {
+        "action_button": {
+            "label": "Save As...",
+            "tooltip": "Save the current session",
+            "callback": callback
+        }
+    }
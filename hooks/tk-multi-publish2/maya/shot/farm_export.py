@@ -0,0 +1,253 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cache export on the farm for the Maya shot publish plugins.
+
+When TK_MAYA_FARM_EXPORT is set, the plugins hand their export command to
+this hook through farm_export_plugin.py instead of running it in the
+artist's session. A snapshot of the
+scene is saved once per publish and every item is exported from it by a
+mayapy task running farm_export_task.py, which also registers the publish
+once the export is done. The job files hold no user credentials, the tasks
+authenticate with the script user set by TK_FARM_SCRIPT_NAME and
+TK_FARM_SCRIPT_KEY in the farm environment.
+
+* TK_MAYA_FARM_EXPORT=tractor spools one Tractor job per item to the
+  engine set by TRACTOR_ENGINE, owned by TRACTOR_OWNER or the current user.
+* TK_MAYA_FARM_EXPORT=local runs the tasks on this workstation, at most
+  TK_MAYA_FARM_WORKERS at a time.
+"""
+
+import concurrent.futures
+import getpass
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import maya.cmds as cmds
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+# tasks run by the local executor
+_local_pool = None
+_local_pool_lock = threading.Lock()
+
+
+class FarmExport(HookBaseClass):
+    """
+    Export of publish items by mayapy tasks.
+    """
+
+    def is_enabled(self):
+        """
+        Return True if exports should run on the farm.
+        """
+        return os.environ.get("TK_MAYA_FARM_EXPORT") in ("tractor", "local")
+
+    def get_environment_error(self):
+        """
+        Return why exports cannot be submitted in this environment, or None.
+        """
+        if os.environ.get("TK_MAYA_FARM_EXPORT") == "tractor" and not os.environ.get("TRACTOR_ENGINE"):
+            return "TRACTOR_ENGINE must be set to spool farm exports to Tractor."
+
+        return None
+
+    def submit(self, plugin, settings, item, command, plugins, register=True):
+        """
+        Submit the export of an item.
+
+        :param plugin: Publish plugin of the item
+        :param settings: Settings of the plugin
+        :param item: Item with a "path" property
+        :param str command: MEL command exporting the item
+        :param list plugins: Maya plugins the command needs
+        :param bool register: Register a publish for the item once exported
+        """
+        path = item.properties["path"]
+        snapshot = self.get_snapshot(item)
+        self.parent.ensure_folder_exists(os.path.dirname(path))
+
+        job = {
+            "snapshot": snapshot,
+            "command": command,
+            "plugins": plugins,
+            "publish": None,
+        }
+        if register:
+            job["sgtk_path"] = sgtk.get_sgtk_module_path()
+            job["host"] = self.parent.shotgun.base_url
+            job["context"] = item.context.serialize(with_user_credentials=False)
+            job["publish"] = {
+                "path": path,
+                "name": plugin.get_publish_name(settings, item),
+                "version_number": plugin.get_publish_version(settings, item),
+                "published_file_type": plugin.get_publish_type(settings, item),
+                "comment": item.description,
+            }
+            job["publish"].update(item.properties.get("publish_kwargs", {}))
+
+        job_path = self.write_job(snapshot, os.path.basename(path), job)
+
+        argv = self.get_task_command(job_path)
+        if os.environ.get("TK_MAYA_FARM_EXPORT") == "tractor":
+            self._spool_tractor_job(item, argv)
+        else:
+            self._run_local_task(item, argv)
+
+        item.properties["farm_submitted"] = True
+
+    def is_submitted(self, item):
+        """
+        Return True if the export of an item was submitted in this publish.
+
+        Its publish is registered by the mayapy task, so the item has no
+        sg_publish_data for the finalize pass.
+        """
+        return bool(item.properties.get("farm_submitted"))
+
+    def get_snapshot(self, item):
+        """
+        Return the scene snapshot of the current publish, saving it first if
+        needed.
+        """
+        root_item = item
+        while root_item.parent:
+            root_item = root_item.parent
+
+        state = root_item.properties.get("farm_export")
+        path = item.properties["path"]
+        if state and path not in state["paths"]:
+            state["paths"].append(path)
+            return state["snapshot"]
+
+        # first item of a new publish
+        scene = cmds.file(query=True, sn=True)
+        snapshot = os.path.join(
+            os.path.dirname(scene),
+            "farm",
+            "%s_%s.mb" % (os.path.splitext(os.path.basename(scene))[0], time.strftime("%Y%m%d_%H%M%S")),
+        )
+        self.parent.ensure_folder_exists(os.path.dirname(snapshot))
+        cmds.file(
+            snapshot,
+            exportAll=True,
+            preserveReferences=True,
+            type="mayaBinary",
+            force=True,
+        )
+        self.logger.info("Saved scene snapshot for the farm: %s" % snapshot)
+
+        root_item.properties["farm_export"] = {"snapshot": snapshot, "paths": [path]}
+
+        return snapshot
+
+    def write_job(self, snapshot, name, job):
+        """
+        Write the job file of a mayapy task next to the scene snapshot and
+        return its path.
+
+        :param str snapshot: Path of the scene snapshot
+        :param str name: Name of the job, unique for the snapshot
+        :param dict job: Job with "snapshot", "command", "plugins" and
+            "publish" keys, see farm_export_task.py
+        """
+        job_path = "%s.%s.json" % (os.path.splitext(snapshot)[0], name)
+        with open(job_path, "w") as fh:
+            json.dump(job, fh)
+
+        return job_path
+
+    def run_task(self, argv):
+        """
+        Run a command and return its duration, return code and output.
+
+        :param list argv: Command line, such as the one of get_task_command
+        """
+        start = time.time()
+        result = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+        return time.time() - start, result.returncode, result.stdout.decode("utf-8", "replace")
+
+    def get_task_command(self, job_path):
+        """
+        Return the command line of a mayapy task, in the rez environment of
+        the current session when there is one.
+        """
+        script = os.path.join(self.disk_location, "farm_export_task.py")
+
+        rez_request = os.environ.get("REZ_USED_REQUEST")
+        if rez_request:
+            return ["rez-env"] + rez_request.split() + ["--", "mayapy", script, job_path]
+
+        mayapy = os.path.join(os.path.dirname(sys.executable), "mayapy")
+        if sys.platform == "win32":
+            mayapy += ".exe"
+
+        return [mayapy, script, job_path]
+
+    def _spool_tractor_job(self, item, argv):
+
+        import tractor.api.author as author
+
+        job = author.Job(service="tractor")
+        job.title = "[MAYA_EXPORT] %s" % os.path.basename(item.properties["path"])
+        job.projects = [item.context.project["name"]]
+        job.service = "Linux64"
+        job.priority = 10
+
+        task = author.Task(title="Export")
+        task.addCommand(author.Command(argv=argv))
+        job.addChild(task)
+        job.spool(
+            hostname=os.environ["TRACTOR_ENGINE"],
+            owner=os.environ.get("TRACTOR_OWNER") or getpass.getuser(),
+        )
+
+        self.logger.info("Spooled farm export of %s" % item.properties["path"])
+
+    def _run_local_task(self, item, argv):
+
+        global _local_pool
+        with _local_pool_lock:
+            if _local_pool is None:
+                _local_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=int(os.environ.get("TK_MAYA_FARM_WORKERS", 2))
+                )
+            future = _local_pool.submit(
+                subprocess.run,
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+
+        path = item.properties["path"]
+        logger = self.logger
+
+        def done(future):
+            try:
+                result = future.result()
+            except Exception:
+                logger.exception("Local export of %s failed to start." % path)
+                return
+            if result.returncode:
+                logger.error(
+                    "Local export of %s failed:\n%s" % (path, result.stdout.decode("utf-8", "replace"))
+                )
+            else:
+                logger.info("Exported %s" % path)
+
+        future.add_done_callback(done)
+        self.logger.info("Queued local export of %s" % path)
@@ -0,0 +1,95 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class FarmExportPublishPlugin(HookBaseClass):
+    """
+    Farm export of the Maya shot cache plugins, see farm_export.py.
+
+    This hook sits between the base file publisher hook and the plugin in the
+    configuration, for example::
+
+        hook: "{self}/publish_file.py:{config}/tk-multi-publish2/maya/shot/farm_export_plugin.py:{config}/tk-multi-publish2/maya/shot/publish_component_abc.py"
+
+    The plugin hands its export command to _submit_farm_export in its publish
+    method. The items it submitted skip the finalize pass, their publish is
+    registered by the mayapy task once exported.
+    """
+
+    def validate(self, settings, item):
+        """
+        Validates the farm environment when farm export is enabled, then runs
+        the base class validation.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+            the keys returned in the settings property. The values are `Setting`
+            instances.
+        :param item: Item to process
+        :returns: True if item is valid, False otherwise.
+        """
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+        if farm_export.is_enabled():
+            error_msg = farm_export.get_environment_error()
+            if error_msg:
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
+
+        return super(FarmExportPublishPlugin, self).validate(settings, item)
+
+    def finalize(self, settings, item):
+        """
+        Execute the finalization pass. This pass executes once all the publish
+        tasks have completed, and can for example be used to version up files.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+            the keys returned in the settings property. The values are `Setting`
+            instances.
+        :param item: Item to process
+        """
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+        if farm_export.is_submitted(item):
+            # the publish is registered by the mayapy task once exported
+            self.logger.info(
+                "Publish of %s will be registered by its farm export."
+                % item.properties["path"]
+            )
+            return
+
+        super(FarmExportPublishPlugin, self).finalize(settings, item)
+
+    def _submit_farm_export(self, settings, item, command, plugins):
+        """
+        Submit the export of an item to the farm if farm export is enabled.
+
+        :param settings: Settings of the plugin
+        :param item: Item with a "path" property
+        :param str command: MEL command exporting the item
+        :param list plugins: Maya plugins the command needs
+        :returns: True if the export was submitted, False if the item should
+            be exported in this session
+        """
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+        if not farm_export.is_enabled():
+            return False
+
+        # exported and registered by a mayapy task
+        farm_export.submit(self, settings, item, command, plugins)
+
+        return True
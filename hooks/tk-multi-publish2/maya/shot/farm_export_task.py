@@ -0,0 +1,71 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+mayapy task exporting one publish item from a scene snapshot, spooled by
+farm_export.py::
+
+    mayapy farm_export_task.py <job.json>
+
+The job file holds the snapshot path, the MEL export command and the Maya
+plugins it needs. When it also holds publish data, the publish is
+registered in ShotGrid once the export succeeded, as the script user set
+by the TK_FARM_SCRIPT_NAME and TK_FARM_SCRIPT_KEY environment variables.
+"""
+
+import json
+import os
+import sys
+import time
+
+
+def main(job_path):
+
+    with open(job_path) as fh:
+        job = json.load(fh)
+
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+    try:
+        import maya.cmds as cmds
+        import maya.mel as mel
+
+        for plugin in job["plugins"]:
+            if not cmds.pluginInfo(plugin, query=True, loaded=True):
+                cmds.loadPlugin(plugin)
+
+        cmds.file(job["snapshot"], open=True, force=True)
+        start = time.time()
+        mel.eval(job["command"])
+        print("Export time: %.3fs" % (time.time() - start))
+    finally:
+        maya.standalone.uninitialize()
+
+    if job["publish"]:
+        sys.path.insert(0, job["sgtk_path"])
+        import sgtk
+
+        # the job holds no user credentials, the farm authenticates as a
+        # script user
+        user = sgtk.authentication.ShotgunAuthenticator().create_script_user(
+            api_script=os.environ["TK_FARM_SCRIPT_NAME"],
+            api_key=os.environ["TK_FARM_SCRIPT_KEY"],
+            host=job["host"],
+        )
+        sgtk.set_authenticated_user(user)
+
+        context = sgtk.Context.deserialize(job["context"])
+        publish = sgtk.util.register_publish(context.sgtk, context, **job["publish"])
+        print("Registered publish %s" % publish["id"])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -0,0 +1,161 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Output format profiles of the Maya shot caches.
+
+The "Output Profile" setting of publish_component_abc.py and
+export_to_local.py names one of the PROFILES below:
+
+* alembic_format: "ogawa" or "hdf5", the AbcExport -dataFormat. The shot
+  collector only collects the USD items of the components, so this only
+  applies to configurations that collect their Alembic items.
+* usd_format: "usdc" (binary crate) or "usda" (text), the format the USD
+  caches are saved in.
+* decimate_static: Replace the time samples of USD attributes that hold
+  the same value on every frame by a single default value. Alembic already
+  writes such samples once, so this only changes the USD caches.
+
+benchmark_output_profiles.py compares the profiles on a sample scene.
+"""
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+PROFILES = {
+    # the exporter defaults
+    "default": {
+        "alembic_format": "ogawa",
+        "usd_format": "usdc",
+        "decimate_static": False,
+    },
+    # smallest files, at the cost of a pass over the USD caches
+    "compact": {
+        "alembic_format": "ogawa",
+        "usd_format": "usdc",
+        "decimate_static": True,
+    },
+    # readable USD caches, for debugging
+    "ascii": {
+        "alembic_format": "ogawa",
+        "usd_format": "usda",
+        "decimate_static": False,
+    },
+    # for tools that still read HDF5 Alembic archives
+    "legacy": {
+        "alembic_format": "hdf5",
+        "usd_format": "usdc",
+        "decimate_static": False,
+    },
+}
+
+# AbcExport -dataFormat values
+ALEMBIC_DATA_FORMATS = {"ogawa": "ogawa", "hdf5": "hdf"}
+
+
+class OutputProfiles(HookBaseClass):
+    """
+    Output format profiles of the Maya shot caches.
+    """
+
+    def get_profile(self, name):
+        """
+        Return the profile with the given name.
+
+        :param str name: Name of the profile
+        :raises Exception: If there is no such profile
+        """
+        return get_profile(name)
+
+    def get_alembic_args(self, profile):
+        """
+        Return the AbcExport job arguments of a profile.
+
+        :param dict profile: Output profile
+        """
+        return get_alembic_args(profile)
+
+    def finalize_usd(self, path, profile):
+        """
+        Save an exported USD cache in the format of a profile, decimating
+        its static attributes if the profile asks for it.
+
+        :param str path: Path of the cache
+        :param dict profile: Output profile
+        """
+        decimated = finalize_usd(path, profile)
+        if decimated:
+            self.logger.debug(
+                "Replaced the time samples of %d static attributes of %s"
+                % (decimated, path)
+            )
+
+
+def get_profile(name):
+    """
+    Return the profile with the given name.
+    """
+    if name not in PROFILES:
+        raise Exception(
+            "Unknown output profile '%s', expected one of: %s"
+            % (name, ", ".join(sorted(PROFILES)))
+        )
+
+    return PROFILES[name]
+
+
+def get_alembic_args(profile):
+    """
+    Return the AbcExport job arguments of a profile.
+    """
+    return ["-dataFormat %s" % ALEMBIC_DATA_FORMATS[profile["alembic_format"]]]
+
+
+def finalize_usd(path, profile):
+    """
+    Save an exported USD cache in the format of a profile and return the
+    number of static attributes decimated.
+    """
+    from pxr import Sdf
+
+    # usdExport writes .usd files as crate, nothing to do for the default
+    # profile
+    if profile["usd_format"] == "usdc" and not profile["decimate_static"]:
+        return 0
+
+    # the exporter may still hold the layer, read what it wrote
+    layer = Sdf.Layer.FindOrOpen(path)
+    layer.Reload()
+
+    decimated = 0
+    if profile["decimate_static"]:
+        paths = []
+        layer.Traverse(Sdf.Path.absoluteRootPath, paths.append)
+        for attribute_path in paths:
+            if not attribute_path.IsPropertyPath():
+                continue
+            times = layer.ListTimeSamplesForPath(attribute_path)
+            if len(times) < 2:
+                continue
+            value = layer.QueryTimeSample(attribute_path, times[0])
+            if any(layer.QueryTimeSample(attribute_path, t) != value for t in times[1:]):
+                continue
+            attribute = layer.GetAttributeAtPath(attribute_path)
+            if attribute is None:
+                continue
+            attribute.default = value
+            for t in times:
+                layer.EraseTimeSample(attribute_path, t)
+            decimated += 1
+
+    layer.Export(path, args={"format": profile["usd_format"]})
+
+    return decimated
@@ -0,0 +1,122 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import threading
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class MayaShotPostPhase(HookBaseClass):
+    """
+    Post phase hook of the Maya shot publisher.
+
+    Once the publish is finalized, the shot is linked to the assets the
+    collector found in the scene, from a background thread so the publisher
+    does not wait for ShotGrid, the cached animation range and
+    sub-components are dropped and the components skipped as unchanged are
+    reported.
+    """
+
+    def post_finalize(self, publish_tree):
+        """
+        Link the shot of every collected shot item to its assets.
+
+        :param publish_tree: The :ref:`publish-api-tree` instance representing
+            the items that were published.
+        """
+        super(MayaShotPostPhase, self).post_finalize(publish_tree)
+
+        root_item = publish_tree.root_item
+
+        # the next publish may run on a different timeline and scene
+        self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/animation_range.py"
+        ).invalidate(root_item)
+        self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/sub_components.py"
+        ).invalidate(root_item)
+
+        skipped = root_item.properties.pop("fingerprint_skipped", None)
+        if skipped:
+            self.logger.info(
+                "%d unchanged components were not exported again: %s"
+                % (len(skipped), ", ".join(skipped))
+            )
+
+        if root_item.properties.get("bg_processing") and not root_item.properties.get(
+            "in_bg_process"
+        ):
+            # the background publishing process will link them
+            return
+
+        links = []
+        for item in publish_tree:
+            asset_codes = item.properties.get("link_assets")
+            if asset_codes:
+                links.append((item.context.project, item.context.entity, asset_codes))
+
+        if links:
+            thread = threading.Thread(
+                target=self._link_assets, args=(root_item, links), name="link_assets"
+            )
+            thread.start()
+
+    def _link_assets(self, root_item, links):
+        """
+        Link shots to the assets with the given codes, with one query for the
+        assets and one update per shot.
+
+        :param root_item: Root item of the publish tree
+        :param list links: (project, shot, asset codes) tuples
+        """
+        entity_fields = self.parent.create_hook_instance("{config}/entity_fields.py")
+
+        try:
+            sg = self.parent.shotgun
+            codes = sorted(set(code for _, _, asset_codes in links for code in asset_codes))
+            projects = dict((x["id"], x) for x, _, _ in links)
+            assets = sg.find(
+                "Asset",
+                [
+                    ["project", "in", list(projects.values())],
+                    ["code", "in", codes],
+                ],
+                ["code", "project"],
+            )
+
+            assets_by_code = {}
+            for asset in assets:
+                assets_by_code[(asset["project"]["id"], asset["code"])] = {
+                    "type": "Asset",
+                    "id": asset["id"],
+                }
+
+            for project, shot, asset_codes in links:
+                shot_assets = [
+                    assets_by_code[(project["id"], x)]
+                    for x in asset_codes
+                    if (project["id"], x) in assets_by_code
+                ]
+                if not shot_assets:
+                    continue
+                entity_fields.update(
+                    root_item,
+                    "Shot",
+                    shot["id"],
+                    {"assets": shot_assets},
+                    multi_entity_update_modes={"assets": "add"},
+                )
+                self.logger.debug(
+                    "Linked %s to %d assets." % (shot["name"], len(shot_assets))
+                )
+        except Exception:
+            self.logger.exception("Failed to link the shot to its assets.")
@@ -76,7 +76,13 @@ class MayaSessionShotCameraAlembicPublishPlugin(HookBaseClass):
                 "description": "Template path for published work files. Should"
                                "correspond to a template defined in "
                                "templates.yml.",
-            }
+            },
+            "Frame Handles": {
+                "type": "int",
+                "default": 1,
+                "description": "Number of frames exported before and after "
+                               "the playback range.",
+            },
         }
 
         # update the base settings
@@ -227,6 +233,23 @@ class MayaSessionShotCameraAlembicPublishPlugin(HookBaseClass):
         if "version" in work_fields:
             item.properties["publish_version"] = work_fields["version"]
 
+        # frame range shared by the shot plugins, see animation_range.py
+        animation_range = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/animation_range.py"
+        )
+        item.properties["frame_range"] = animation_range.get_range(
+            item, settings["Frame Handles"].value)
+
+        # build the alembic export job of the item
+        item.properties["alembic_job"] = self._get_alembic_job(item)
+        item.properties.pop("alembic_exported", None)
+        item.properties.pop("alembic_batch_failed", None)
+        item.properties.pop("camera_exported", None)
+
+        # exported from the same bake as the Maya file of the camera, see
+        # camera_bake.py
+        item.properties["camera_bake"] = True
+
         # run the base class validation
         return super(MayaSessionShotCameraAlembicPublishPlugin, self).validate(
             settings, item)
@@ -251,6 +274,39 @@ class MayaSessionShotCameraAlembicPublishPlugin(HookBaseClass):
         publish_folder = os.path.dirname(publish_path)
         self.parent.ensure_folder_exists(publish_folder)
 
+        # exported and registered by a mayapy task when farm export is
+        # enabled, see farm_export_plugin.py
+        if self._submit_farm_export(
+            settings,
+            item,
+            'AbcExport -j "%s"' % item.properties["alembic_job"],
+            ["AbcExport"],
+        ):
+            return
+
+        camera_bake = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/camera_bake.py"
+        )
+
+        # the alembic file is exported together with the Maya file of the
+        # camera, see camera_bake.py
+        try:
+            camera_bake.export(item)
+        except Exception as e:
+            self.logger.error("Failed to export Geometry: %s" % e)
+            return
+
+        # Now that the path has been generated, hand it off to the
+        super(MayaSessionShotCameraAlembicPublishPlugin, self).publish(settings, item)
+
+    def _get_alembic_job(self, item):
+        """
+        Return the AbcExport job arguments of an item.
+
+        :param item: Item to process
+        """
+        publish_path = item.properties["path"]
+
         # set the alembic args that make the most sense when working with Mari.
         # These flags will ensure the export of an Alembic file that contains
         # all visible geometry from the current scene together with UV's and
@@ -270,7 +326,7 @@ class MayaSessionShotCameraAlembicPublishPlugin(HookBaseClass):
         ]
 
         # find the animated frame range to use:
-        start_frame, end_frame = _find_scene_animation_range()
+        start_frame, end_frame = item.properties["frame_range"]
         if start_frame and end_frame:
             alembic_args.append("-fr %d %d" % (start_frame, end_frame))
 
@@ -280,40 +336,7 @@ class MayaSessionShotCameraAlembicPublishPlugin(HookBaseClass):
         # Note: The AbcExport command expects forward slashes!
         alembic_args.append("-file %s" % publish_path.replace("\\", "/"))
 
-        # build the export command.  Note, use AbcExport -help in Maya for
-        # more detailed Alembic export help
-        abc_export_cmd = ("AbcExport -j \"%s\"" % " ".join(alembic_args))
-
-        # ...and execute it:
-        try:
-            self.parent.log_debug("Executing command: %s" % abc_export_cmd)
-            mel.eval(abc_export_cmd)
-        except Exception as e:
-            self.logger.error("Failed to export Geometry: %s" % e)
-            return
-
-        # Now that the path has been generated, hand it off to the
-        super(MayaSessionShotCameraAlembicPublishPlugin, self).publish(settings, item)
-
-def _find_scene_animation_range():
-    """
-    Find the animation range from the current scene.
-    """
-    # look for any animation in the scene:
-    animation_curves = cmds.ls(typ="animCurve")
-
-    # if there aren't any animation curves then just return
-    # a single frame:
-    if not animation_curves:
-        return 1, 1
-
-    # something in the scene is animated so return the
-    # current timeline.  This could be extended if needed
-    # to calculate the frame range of the animated curves.
-    start = int(cmds.playbackOptions(q=True, min=True)) - 1
-    end = int(cmds.playbackOptions(q=True, max=True)) + 1
-
-    return start, end
+        return " ".join(alembic_args)
 
 
 def _session_path():
@@ -76,7 +76,13 @@ class MayaSessionShotCameraMayaAsciiPublishPlugin(HookBaseClass):
                 "description": "Template path for published work files. Should"
                                "correspond to a template defined in "
                                "templates.yml.",
-            }
+            },
+            "Frame Handles": {
+                "type": "int",
+                "default": 1,
+                "description": "Number of frames baked before and after "
+                               "the playback range.",
+            },
         }
 
         # update the base settings
@@ -227,6 +233,14 @@ class MayaSessionShotCameraMayaAsciiPublishPlugin(HookBaseClass):
         if "version" in work_fields:
             item.properties["publish_version"] = work_fields["version"]
 
+        # frame range shared by the shot plugins, see animation_range.py
+        animation_range = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/animation_range.py"
+        )
+        item.properties["frame_range"] = animation_range.get_range(
+            item, settings["Frame Handles"].value)
+        item.properties.pop("camera_exported", None)
+
         # run the base class validation
         return super(MayaSessionShotCameraMayaAsciiPublishPlugin, self).validate(
             settings, item)
@@ -252,10 +266,14 @@ class MayaSessionShotCameraMayaAsciiPublishPlugin(HookBaseClass):
         self.parent.ensure_folder_exists(publish_folder)
 
 
-        # ...and execute it:
+        camera_bake = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/camera_bake.py"
+        )
+
+        # the camera is baked once for its Maya and alembic files, see
+        # camera_bake.py
         try:
-            cmds.select(item.properties['name'])
-            _fix_and_export(item,publish_path)
+            camera_bake.export(item)
         except Exception as e:
             self.logger.error("Failed to export camera export: %s" % e)
             return
@@ -263,50 +281,6 @@ class MayaSessionShotCameraMayaAsciiPublishPlugin(HookBaseClass):
         # Now that the path has been generated, hand it off to the
         super(MayaSessionShotCameraMayaAsciiPublishPlugin, self).publish(settings, item)
 
-    
-def _fix_and_export(item,publish_path):
-
-    children = cmds.listRelatives(item.properties['name'],ad=1,c=True, f=True)
-    shapes = [node for node in children if cmds.nodeType(node) == "camera"]
-    if not cmds.undoInfo(q=1,state=1):
-        cmds.undoInfo(state=1)
-    cmds.undoInfo(openChunk=True,chunkName="fixcamattr",infinity=1)    
-    try:
-        for shape in shapes:
-            cmds.setAttr(shape + '.overscan', 1.0)
-            if cmds.getAttr(shape + '.panZoomEnabled') == True:
-                cmds.setAttr(shape + '.pan', 0.0, 0.0, typ='float2')
-                cmds.setAttr(shape + '.zoom', 1.0)
-                if cmds.getAttr(shape + '.renderPanZoom') == True:
-                    cmds.setAttr(shape + '.renderPanZoom', False)
-                cmds.setAttr(shape + '.panZoomEnabled', False)
-
-    finally:
-        cmds.undoInfo(closeChunk=True)    
-        cmds.file(publish_path.replace("\\", "/"),f=1,es=1,op="v=0",typ="mayaBinary")
-        cmds.undo()
-
-
-def _find_scene_animation_range():
-    """
-    Find the animation range from the current scene.
-    """
-    # look for any animation in the scene:
-    animation_curves = cmds.ls(typ="animCurve")
-
-    # if there aren't any animation curves then just return
-    # a single frame:
-    if not animation_curves:
-        return 1, 1
-
-    # something in the scene is animated so return the
-    # current timeline.  This could be extended if needed
-    # to calculate the frame range of the animated curves.
-    start = int(cmds.playbackOptions(q=True, min=True))
-    end = int(cmds.playbackOptions(q=True, max=True))
-
-    return start, end
-
 
 def _session_path():
     """
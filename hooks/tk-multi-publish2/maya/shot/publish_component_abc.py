@@ -76,7 +76,32 @@ class MayaSessionComponentAlembicPublishPlugin(HookBaseClass):
                 "description": "Template path for published work files. Should"
                                "correspond to a template defined in "
                                "templates.yml.",
-            }
+            },
+            "Frame Handles": {
+                "type": "int",
+                "default": 5,
+                "description": "Number of frames exported before and after "
+                               "the playback range.",
+            },
+            "Output Profile": {
+                "type": "str",
+                "default": "default",
+                "description": "Output format profile of the Alembic file, "
+                               "see output_profiles.py.",
+            },
+            "Chunk Size": {
+                "type": "int",
+                "default": 0,
+                "description": "Longer frame ranges are exported in chunks "
+                               "of this many frames, see alembic_chunks.py. "
+                               "0 exports the range in one go.",
+            },
+            "Chunk Overlap": {
+                "type": "int",
+                "default": 10,
+                "description": "Frames evaluated before each chunk so it "
+                               "matches an export of the whole range.",
+            },
         }
 
         # update the base settings
@@ -230,6 +255,46 @@ class MayaSessionComponentAlembicPublishPlugin(HookBaseClass):
         if "version" in work_fields:
             item.properties["publish_version"] = work_fields["version"]
 
+        # frame range shared by the shot plugins, see animation_range.py
+        animation_range = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/animation_range.py"
+        )
+        item.properties["frame_range"] = animation_range.get_range(
+            item, settings["Frame Handles"].value)
+
+        # output format of the alembic file, see output_profiles.py
+        output_profiles = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/output_profiles.py"
+        )
+        try:
+            item.properties["output_profile"] = output_profiles.get_profile(
+                settings["Output Profile"].value)
+        except Exception as e:
+            self.logger.error(str(e))
+            raise
+
+        # build the alembic export job of the item
+        item.properties["alembic_job"] = self._get_alembic_job(item)
+        item.properties.pop("alembic_exported", None)
+        item.properties.pop("alembic_batch_failed", None)
+
+        # long shots are exported in frame chunks, see alembic_chunks.py
+        alembic_chunks = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/alembic_chunks.py"
+        )
+        start_frame, end_frame = item.properties["frame_range"]
+        item.properties["alembic_chunks"] = alembic_chunks.get_chunks(
+            start_frame, end_frame, item.properties['sub_frame'],
+            settings["Chunk Size"].value)
+        item.properties["alembic_chunk_overlap"] = settings["Chunk Overlap"].value
+
+        # components unchanged since their last publish are not exported
+        # again, see component_fingerprint.py
+        component_fingerprint = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/component_fingerprint.py"
+        )
+        component_fingerprint.check(self, settings, item)
+
         # run the base class validation
         return super(MayaSessionComponentAlembicPublishPlugin, self).validate(
             settings, item)
@@ -254,6 +319,53 @@ class MayaSessionComponentAlembicPublishPlugin(HookBaseClass):
         publish_folder = os.path.dirname(publish_path)
         self.parent.ensure_folder_exists(publish_folder)
 
+        if item.properties.get("unchanged_publish"):
+            component_fingerprint = self.parent.create_hook_instance(
+                "{config}/tk-multi-publish2/maya/shot/component_fingerprint.py"
+            )
+            component_fingerprint.relink(item)
+            super(MayaSessionComponentAlembicPublishPlugin, self).publish(settings, item)
+            return
+
+        # exported and registered by a mayapy task when farm export is
+        # enabled, see farm_export_plugin.py
+        if self._submit_farm_export(
+            settings,
+            item,
+            'AbcExport -j "%s"' % item.properties["alembic_job"],
+            ["AbcExport"],
+        ):
+            return
+
+        alembic_batch = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/alembic_batch.py"
+        )
+        alembic_chunks = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/alembic_chunks.py"
+        )
+
+        # the alembic file is exported together with the other alembic items
+        # of the publish, see alembic_batch.py, unless it is split in chunks
+        try:
+            if item.properties.get("alembic_chunks"):
+                alembic_chunks.export(item)
+            else:
+                alembic_batch.export(item)
+        except Exception as e:
+            self.logger.error("Failed to export Geometry: %s" % e)
+            return
+
+        # Now that the path has been generated, hand it off to the
+        super(MayaSessionComponentAlembicPublishPlugin, self).publish(settings, item)
+
+    def _get_alembic_job(self, item):
+        """
+        Return the AbcExport job arguments of an item.
+
+        :param item: Item to process
+        """
+        publish_path = item.properties["path"]
+
         # set the alembic args that make the most sense when working with Mari.
         # These flags will ensure the export of an Alembic file that contains
         # all visible geometry from the current scene together with UV's and
@@ -276,8 +388,15 @@ class MayaSessionComponentAlembicPublishPlugin(HookBaseClass):
 
         ]
 
+        # file format of the configured output profile
+        output_profiles = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/output_profiles.py"
+        )
+        alembic_args.extend(
+            output_profiles.get_alembic_args(item.properties["output_profile"]))
+
         # find the animated frame range to use:
-        start_frame, end_frame = _find_scene_animation_range()
+        start_frame, end_frame = item.properties["frame_range"]
         if start_frame and end_frame:
             alembic_args.append("-fr %d %d" % (start_frame, end_frame))
 
@@ -292,42 +411,7 @@ class MayaSessionComponentAlembicPublishPlugin(HookBaseClass):
         # Note: The AbcExport command expects forward slashes!
         alembic_args.append("-file %s" % publish_path.replace("\\", "/"))
 
-        # build the export command.  Note, use AbcExport -help in Maya for
-        # more detailed Alembic export help
-        abc_export_cmd = ("AbcExport -j \"%s\"" % " ".join(alembic_args))
-
-        # ...and execute it:
-        try:
-            self.parent.log_debug("Executing command: %s" % abc_export_cmd)
-            mel.eval(abc_export_cmd)
-        except Exception as e:
-            self.logger.error("Failed to export Geometry: %s" % e)
-            return
-
-        # Now that the path has been generated, hand it off to the
-        super(MayaSessionComponentAlembicPublishPlugin, self).publish(settings, item)
-
-
-
-def _find_scene_animation_range():
-    """
-    Find the animation range from the current scene.
-    """
-    # look for any animation in the scene:
-    animation_curves = cmds.ls(typ="animCurve")
-
-    # if there aren't any animation curves then just return
-    # a single frame:
-    if not animation_curves:
-        return 1, 1
-
-    # something in the scene is animated so return the
-    # current timeline.  This could be extended if needed
-    # to calculate the frame range of the animated curves.
-    start = int(cmds.playbackOptions(q=True, min=True)) - 5
-    end = int(cmds.playbackOptions(q=True, max=True)) + 5
-
-    return start, end
+        return " ".join(alembic_args)
 
 
 def _session_path():
@@ -0,0 +1,448 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import re
+
+import maya.cmds as cmds
+import maya.mel as mel
+from pxr import Kind, Sdf, Usd, UsdGeom
+import sgtk
+from tank_vendor import six
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class MayaSessionShotUSDAssemblyPublishPlugin(HookBaseClass):
+    """
+    Plugin for publishing the USD assembly of a shot.
+
+    The shot geometry is not exported again. The plugin writes a root layer
+    with one payload per component of the shot, pointing at the cache the
+    component plugins export (export_to_local.py for USD, or
+    publish_component_abc.py for Alembic), and one transform per set group
+    from the values captured by the collector.
+
+    The layer is written and registered in the finalize pass, once every
+    component cache has been exported and published, and depends on the
+    publishes of the caches.
+
+    This hook relies on functionality found in the base file publisher hook in
+    the publish2 app and should inherit from it in the configuration. The hook
+    setting for this plugin should look something like this::
+
+        hook: "{self}/publish_file.py:{config}/tk-multi-publish2/maya/shot/publish_shot_usd.py"
+
+    """
+
+    # NOTE: The plugin icon and name are defined by the base file plugin.
+
+    @property
+    def description(self):
+        """
+        Verbose, multi-line description of what the plugin does. This can
+        contain simple html for formatting.
+        """
+
+        return """
+        <p>This plugin publishes a USD assembly of the shot. The assembly
+        references the caches of the shot components and holds the transforms
+        of the set groups, it does not contain any geometry itself. It is
+        written to the path defined by this plugin's configured "Publish
+        Template" setting.</p>
+        """
+
+    @property
+    def settings(self):
+        """
+        Dictionary defining the settings that this plugin expects to receive
+        through the settings parameter in the accept, validate, publish and
+        finalize methods.
+
+        A dictionary on the following form::
+
+            {
+                "Settings Name": {
+                    "type": "settings_type",
+                    "default": "default_value",
+                    "description": "One line description of the setting"
+            }
+
+        The type string should be one of the data types that toolkit accepts as
+        part of its environment configuration.
+        """
+        # inherit the settings from the base publish plugin
+        base_settings = super(MayaSessionShotUSDAssemblyPublishPlugin, self).settings or {}
+
+        # settings specific to this class
+        maya_publish_settings = {
+            "Publish Template": {
+                "type": "template",
+                "default": None,
+                "description": "Template path for published work files. Should"
+                               "correspond to a template defined in "
+                               "templates.yml.",
+            },
+            "Frame Handles": {
+                "type": "int",
+                "default": 20,
+                "description": "Number of frames added to the time range of "
+                               "the assembly before and after the playback "
+                               "range.",
+            },
+        }
+
+        # update the base settings
+        base_settings.update(maya_publish_settings)
+
+        return base_settings
+
+    @property
+    def item_filters(self):
+        """
+        List of item types that this plugin is interested in.
+
+        Only items matching entries in this list will be presented to the
+        accept() method. Strings can contain glob patters such as *, for example
+        ["maya.*", "file.maya"]
+        """
+        return ["maya.session.shot.usd"]
+
+    def accept(self, settings, item):
+        """
+        Method called by the publisher to determine if an item is of any
+        interest to this plugin. Only items matching the filters defined via the
+        item_filters property will be presented to this method.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+            the keys returned in the settings property. The values are `Setting`
+            instances.
+        :param item: Item to process
+
+        :returns: dictionary with boolean keys accepted, required and enabled
+        """
+
+        accepted = True
+        publisher = self.parent
+        template_name = settings["Publish Template"].value
+
+        # ensure a work file template is available on the parent item
+        work_template = item.parent.properties.get("work_template")
+        if not work_template:
+            self.logger.debug(
+                "A work template is required for the session item in order to "
+                "publish the shot assembly. Not accepting the shot item."
+            )
+            accepted = False
+
+        # ensure the publish template is defined and valid
+        publish_template = publisher.get_template_by_name(template_name)
+        if not publish_template:
+            self.logger.debug(
+                "The valid publish template could not be determined for the "
+                "shot assembly item. Not accepting the item."
+            )
+            accepted = False
+
+        # we've validated the publish template. add it to the item properties
+        # for use in subsequent methods
+        item.properties["publish_template"] = publish_template
+
+        # because a publish template is configured, disable context change. This
+        # is a temporary measure until the publisher handles context switching
+        # natively.
+        item.context_change_allowed = False
+
+        return {
+            "accepted": accepted,
+            "checked": True
+        }
+
+    def validate(self, settings, item):
+        """
+        Validates the given item to check that it is ok to publish. Returns a
+        boolean to indicate validity.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+            the keys returned in the settings property. The values are `Setting`
+            instances.
+        :param item: Item to process
+        :returns: True if item is valid, False otherwise.
+        """
+
+        path = _session_path()
+
+        # ---- ensure the session has been saved
+
+        if not path:
+            # the session still requires saving. provide a save button.
+            # validation fails.
+            error_msg = "The Maya session has not been saved."
+            self.logger.error(
+                error_msg,
+                extra=_get_save_as_action()
+            )
+            raise Exception(error_msg)
+
+        # get the normalized path
+        path = sgtk.util.ShotgunPath.normalize(path)
+
+        # get the configured work file template
+        work_template = item.parent.properties.get("work_template")
+        publish_template = item.properties.get("publish_template")
+
+        # get the current scene path and extract fields from it using the work
+        # template:
+        work_fields = work_template.get_fields(path)
+
+        # ensure the fields work for the publish template
+        missing_keys = publish_template.missing_keys(work_fields)
+        if missing_keys:
+            error_msg = "Work file '%s' missing keys required for the " \
+                        "publish template: %s" % (path, missing_keys)
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        # create the publish path by applying the fields. store it in the item's
+        # properties. This is the path we'll create and then publish in the base
+        # publish plugin. Also set the publish_path to be explicit.
+        item.properties["path"] = publish_template.apply_fields(work_fields)
+        item.properties["publish_path"] = item.properties["path"]
+
+        # use the work file's version number when publishing
+        if "version" in work_fields:
+            item.properties["publish_version"] = work_fields["version"]
+
+        # frame range shared by the shot plugins, see animation_range.py
+        animation_range = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/animation_range.py"
+        )
+        item.properties["frame_range"] = animation_range.get_range(
+            item, settings["Frame Handles"].value)
+
+        # the assembly only references the components that are exported
+        uncached = [
+            name
+            for name, component in self._get_components(item).items()
+            if not _is_active(component)
+        ]
+        if uncached:
+            self.logger.warning(
+                "No cache is exported for these components, they are left out "
+                "of the shot assembly: %s" % ", ".join(sorted(uncached))
+            )
+
+        # run the base class validation
+        return super(MayaSessionShotUSDAssemblyPublishPlugin, self).validate(
+            settings, item)
+
+    def publish(self, settings, item):
+        """
+        Executes the publish logic for the given item and settings.
+
+        The components of the shot are published after the shot item, so the
+        layer is only written in the finalize pass, once their caches exist.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+            the keys returned in the settings property. The values are `Setting`
+            instances.
+        :param item: Item to process
+        """
+
+        # get the path to create and publish
+        publish_path = item.properties["path"]
+
+        # ensure the publish folder exists:
+        publish_folder = os.path.dirname(publish_path)
+        self.parent.ensure_folder_exists(publish_folder)
+
+        self.logger.debug(
+            "The shot assembly is written once its component caches are "
+            "published."
+        )
+
+    def finalize(self, settings, item):
+        """
+        Write and register the shot assembly, if the cache of every exported
+        component was published. Unchecked components are left out.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+            the keys returned in the settings property. The values are `Setting`
+            instances.
+        :param item: Item to process
+        """
+        publish_path = item.properties["path"]
+
+        farm_export = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/farm_export.py"
+        )
+
+        caches = {}
+        missing = []
+        for name, component in self._get_components(item).items():
+            if not _is_active(component):
+                continue
+            cache_path = component.properties.get("usd_export_path") or component.properties.get("path")
+            if farm_export.is_submitted(component):
+                missing.append("%s (exported on the farm)" % name)
+            elif "sg_publish_data" not in component.properties or not cache_path \
+                    or not os.path.exists(cache_path):
+                missing.append(name)
+            else:
+                caches[name] = cache_path
+
+        if missing:
+            self.logger.warning(
+                "The shot assembly was not published, no cache is published "
+                "for: %s" % ", ".join(missing)
+            )
+            return
+
+        try:
+            payloads = self._write_assembly(item, publish_path, caches)
+        except Exception as e:
+            self.logger.error("Failed to export the shot assembly: %s" % e)
+            return
+
+        self.logger.info(
+            "Assembled the shot from %d component caches." % payloads
+        )
+
+        # the publishes of the component caches are the dependencies of the
+        # assembly
+        item.properties["publish_dependencies"] = sorted(set(caches.values()))
+
+        super(MayaSessionShotUSDAssemblyPublishPlugin, self).publish(settings, item)
+        super(MayaSessionShotUSDAssemblyPublishPlugin, self).finalize(settings, item)
+
+    def _get_components(self, item):
+        """
+        Return the component items of the shot by component name. An item
+        that is published is preferred, and the USD item of a component is
+        preferred to its Alembic one. Components nested in another component
+        are part of its cache and are left out, see sub_components.py.
+
+        :param item: Shot USD item
+        """
+        sub_component_index = self.parent.create_hook_instance(
+            "{config}/tk-multi-publish2/maya/shot/sub_components.py"
+        )
+
+        def rank(child):
+            return (_is_active(child), child.type_spec.endswith(".usd"))
+
+        components = {}
+        for child in item.children:
+            name = child.properties["name"]
+            if sub_component_index.get_parent_component(child):
+                continue
+            if name not in components or rank(child) > rank(components[name]):
+                components[name] = child
+
+        return components
+
+    def _write_assembly(self, item, publish_path, caches):
+        """
+        Write the root layer of the shot.
+
+        :param item: Shot USD item
+        :param str publish_path: Path of the layer
+        :param dict caches: Cache paths by component name
+        :returns: Number of payloads in the layer
+        """
+        layer_folder = os.path.dirname(publish_path)
+
+        stage = Usd.Stage.CreateInMemory()
+        UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+        start_frame, end_frame = item.properties["frame_range"]
+        stage.SetStartTimeCode(start_frame)
+        stage.SetEndTimeCode(end_frame)
+        stage.SetTimeCodesPerSecond(mel.eval("currentTimeUnitToFPS"))
+
+        shot_path = Sdf.Path("/%s" % _prim_name(item.properties["name"]))
+        shot_prim = UsdGeom.Xform.Define(stage, shot_path).GetPrim()
+        Usd.ModelAPI(shot_prim).SetKind(Kind.Tokens.assembly)
+        stage.SetDefaultPrim(shot_prim)
+
+        payloads = 0
+        for name, cache_path in sorted(caches.items()):
+            # the caches already hold the transform of their root node, so
+            # the payload prims are not transformed again
+            prim = UsdGeom.Xform.Define(
+                stage, shot_path.AppendChild(_prim_name(name))
+            ).GetPrim()
+
+            # relative so the shot publish folder can be moved as a whole
+            asset_path = os.path.relpath(cache_path, layer_folder).replace("\\", "/")
+            if not asset_path.startswith("."):
+                asset_path = "./" + asset_path
+            prim.GetPayloads().AddPayload(asset_path)
+            payloads += 1
+            Usd.ModelAPI(prim).SetKind(Kind.Tokens.component)
+
+        stage.GetRootLayer().Export(publish_path)
+
+        return payloads
+
+
+def _is_active(item):
+    """
+    Return True if an item is checked and has an active publish task.
+    """
+    return item.checked and any(task.active for task in item.tasks)
+
+
+def _prim_name(name):
+    """
+    Return a valid prim name for a Maya node name.
+    """
+    name = re.sub(r"\W", "_", name.split("|")[-1])
+    if name[:1].isdigit():
+        name = "_" + name
+
+    return name
+
+
+def _session_path():
+    """
+    Return the path to the current session
+    :return:
+    """
+    path = cmds.file(query=True, sn=True)
+
+    if path is not None:
+        path = six.ensure_str(path)
+
+    return path
+
+
+def _get_save_as_action():
+    """
+    Simple helper for returning a log action dict for saving the session
+    """
+
+    engine = sgtk.platform.current_engine()
+
+    # default save callback
+    callback = cmds.SaveScene
+
+    # if workfiles2 is configured, use that for file save
+    if "tk-multi-workfiles2" in engine.apps:
+        app = engine.apps["tk-multi-workfiles2"]
+        if hasattr(app, "show_file_save_dlg"):
+            callback = app.show_file_save_dlg
+
+    return {
+        "action_button": {
+            "label": "Save As...",
+            "tooltip": "Save the current session",
+            "callback": callback
+        }
+    }
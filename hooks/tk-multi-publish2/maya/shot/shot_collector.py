@@ -10,12 +10,16 @@
 
 import glob
 import os
+import maya.api.OpenMaya as om
 import maya.cmds as cmds
 import maya.mel as mel
 import sgtk
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# name patterns of the transforms collected as shot components
+SCENE_INDEX_PATTERNS = ["cache_grp", "setgrp", "simDummy_grp", "bone_grp"]
+
 
 class MayaSessionCollector(HookBaseClass):
     """
@@ -94,10 +98,20 @@ class MayaSessionCollector(HookBaseClass):
                     }
                 },
             )
-            self.collect_shot(item)
-            self.collect_camera(item)
-            self.collect_dummy(item)
-            self.collect_sim_dummy(item)
+            # shotgrid fields, the animation range and the sub-components are
+            # cached on the root item for this session
+            self.parent.create_hook_instance("{config}/entity_fields.py").invalidate(parent_item)
+            self.parent.create_hook_instance(
+                "{config}/tk-multi-publish2/maya/shot/animation_range.py"
+            ).invalidate(parent_item)
+            self.parent.create_hook_instance(
+                "{config}/tk-multi-publish2/maya/shot/sub_components.py"
+            ).invalidate(parent_item)
+            scene_index = SceneIndex(SCENE_INDEX_PATTERNS)
+            self.collect_shot(item, scene_index)
+            self.collect_camera(item, scene_index)
+            self.collect_dummy(item, scene_index)
+            self.collect_sim_dummy(item, scene_index)
             # self.collect_playblasts(item, project_root)
             # self.collect_alembic_caches(item, project_root)
         else:
@@ -115,7 +129,7 @@ class MayaSessionCollector(HookBaseClass):
 
         
     
-    def collect_shot(self,parent_item):
+    def collect_shot(self,parent_item,scene_index):
         
         shot_name = parent_item.context.entity['name']
         start_frame = cmds.playbackOptions(min=1,q=1)
@@ -139,50 +153,35 @@ class MayaSessionCollector(HookBaseClass):
         usd_item.properties['e_f'] = end_frame
         usd_item.set_icon_from_path(usd_icon_path)
         
-        self.collect_shot_assets(usd_item,"usd")
-        self.collect_shot_set_assets(usd_item,"usd")
+        self.collect_shot_assets(usd_item,"usd",scene_index)
+        self.collect_shot_set_assets(usd_item,"usd",scene_index)
 
         ####        
-        self.link_assets()
+        self.link_assets(usd_item,scene_index)
         self.logger.debug("Collected shot : %s"%(shot_name))
         
-    def link_assets(self):   
-
-        publisher = self.parent
-        entity = publisher.context.entity
-        project = publisher.context.project
+    def link_assets(self,item,scene_index):   
+        """
+        Store the codes of the assets cached in the shot on the shot item.
 
-        sg = self.tank.shotgun
-        sub_frame = sg.find_one("Shot",[['id','is',entity['id']]],['sg_sub_frame'])['sg_sub_frame']
-        
+        The shot is linked to them in ShotGrid by the post phase hook once
+        the publish is finalized, see post_phase.py.
+        """
+        shot_asset_list = [ scene_index.children[x][0].split(":")[-1] for x in scene_index.buckets['cache_grp']
+        if scene_index.children.get(x) and scene_index.get_top_level(x).find("setgrp") == -1] 
 
-        shot_asset_list = [ cmds.listRelatives(x,c=1)[0].split(":")[-1] for x in cmds.ls(type="transform") if not x.find('cache_grp') == -1 
-        and cmds.ls(x,l=1)[0].split("|")[1].find("setgrp") == -1] 
-        for asset in shot_asset_list:
-            search = [
-                ['project','is',project],
-                ['code','is',asset]
-            ]
-            asset_ent = sg.find_one("Asset",search)
-            if asset_ent:
-                sg.update("Shot",entity['id'],{"assets":[asset_ent]},
-                          multi_entity_update_modes={'tags':'add'})
+        item.properties['link_assets'] = sorted(set(shot_asset_list))
         
-    def collect_shot_set_assets(self,parent_item,cache_type):
+    def collect_shot_set_assets(self,parent_item,cache_type,scene_index):
 
 
-        publisher = self.parent
-        entity = publisher.context.entity
-        sg = self.tank.shotgun
-        sub_frame = sg.find_one("Shot",[['id','is',entity['id']]],['sg_sub_frame'])['sg_sub_frame']
-
-        if not sub_frame :
-            sub_frame = 0.25
+        sub_frame = self._get_sub_frame(parent_item)
             
         
-        shot_asset_list = [ x for x in cmds.ls(type="transform") if not x.find('setgrp') == -1 
-        and not cmds.listRelatives(x,p=1)] 
+        shot_asset_list = [ x for x in scene_index.buckets['setgrp'] if not scene_index.parents[x] ] 
         
+        transforms = scene_index.get_transforms(shot_asset_list)
+
         for asset in shot_asset_list:
 
             component_name = asset
@@ -206,9 +205,9 @@ class MayaSessionCollector(HookBaseClass):
 
                 usd_item.properties['name'] = component_name
                 usd_item.properties['namespace'] = component_name.split(":")[0]
-                usd_item.properties['translate'] = cmds.xform(component_name,q=1,t=1)
-                usd_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-                usd_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+                usd_item.properties['translate'] = transforms[component_name]['translate']
+                usd_item.properties['rotate'] = transforms[component_name]['rotate']
+                usd_item.properties['scale'] = transforms[component_name]['scale']
                 usd_item.properties['sub_frame'] = sub_frame
                 usd_item.set_icon_from_path(usd_icon_path)
 
@@ -230,33 +229,29 @@ class MayaSessionCollector(HookBaseClass):
 
                 abc_item.properties['name'] = component_name
                 abc_item.properties['namespace'] = component_name.split(":")[0]
-                abc_item.properties['matrix'] = cmds.xform(component_name,q=1,m=1)
-                abc_item.properties['translaate'] = cmds.xform(component_name,q=1,t=1)
-                abc_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-                abc_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+                abc_item.properties['matrix'] = transforms[component_name]['matrix']
+                abc_item.properties['translate'] = transforms[component_name]['translate']
+                abc_item.properties['rotate'] = transforms[component_name]['rotate']
+                abc_item.properties['scale'] = transforms[component_name]['scale']
                 abc_item.properties['sub_frame'] = sub_frame
                 abc_item.set_icon_from_path(abc_icon_path)
     
             self.logger.debug("Collected shot asset : %s"%(component_name))   
         
-    def collect_shot_assets(self,parent_item,cache_type):
+    def collect_shot_assets(self,parent_item,cache_type,scene_index):
 
-        publisher = self.parent
-        entity = publisher.context.entity
-        sg = self.tank.shotgun
-        sub_frame = sg.find_one("Shot",[['id','is',entity['id']]],['sg_sub_frame'])['sg_sub_frame']
-        
-        if not sub_frame :
-            sub_frame = 0.25
+        sub_frame = self._get_sub_frame(parent_item)
 
-        shot_asset_list = [ x for x in cmds.ls(type="transform") if not x.find('cache_grp') == -1 
-        and cmds.ls(x,l=1)[0].split("|")[1].find("setgrp") == -1] 
+        shot_asset_list = [ x for x in scene_index.buckets['cache_grp']
+        if scene_index.get_top_level(x).find("setgrp") == -1] 
 
-        sim_dummy_list = [ x for x in cmds.ls(type="transform") if not x.find('simDummy_grp') == -1 ]
+        sim_dummy_list = list(scene_index.buckets['simDummy_grp'])
 
         if sim_dummy_list and cache_type == "abc": 
             shot_asset_list.extend(sim_dummy_list)
         
+        transforms = scene_index.get_transforms(shot_asset_list)
+
         for asset in shot_asset_list:
 
             component_name = asset
@@ -280,9 +275,9 @@ class MayaSessionCollector(HookBaseClass):
 
                 usd_item.properties['name'] = component_name
                 usd_item.properties['namespace'] = component_name.split(":")[0]
-                usd_item.properties['translate'] = cmds.xform(component_name,q=1,t=1)
-                usd_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-                usd_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+                usd_item.properties['translate'] = transforms[component_name]['translate']
+                usd_item.properties['rotate'] = transforms[component_name]['rotate']
+                usd_item.properties['scale'] = transforms[component_name]['scale']
                 usd_item.properties['sub_frame'] = sub_frame
                 usd_item.set_icon_from_path(usd_icon_path)
             
@@ -303,17 +298,17 @@ class MayaSessionCollector(HookBaseClass):
 
                 abc_item.properties['name'] = component_name
                 abc_item.properties['namespace'] = component_name.split(":")[0]
-                abc_item.properties['matrix'] = cmds.xform(component_name,q=1,m=1)
-                abc_item.properties['translaate'] = cmds.xform(component_name,q=1,t=1)
-                abc_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-                abc_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+                abc_item.properties['matrix'] = transforms[component_name]['matrix']
+                abc_item.properties['translate'] = transforms[component_name]['translate']
+                abc_item.properties['rotate'] = transforms[component_name]['rotate']
+                abc_item.properties['scale'] = transforms[component_name]['scale']
                 abc_item.properties['sub_frame'] = sub_frame
                 abc_item.set_icon_from_path(abc_icon_path)
 
     
             self.logger.debug("Collected shot asset : %s"%(component_name)) 
     
-    def collect_camera(self,parent_item):
+    def collect_camera(self,parent_item,scene_index):
 
         camera_transform_name = ['mmCam','layoutCam','aniCam','renderCam','projectionCam']
         shot_name = parent_item.context.entity['name']
@@ -345,7 +340,10 @@ class MayaSessionCollector(HookBaseClass):
             "alembic.png"
         )
         
-        for transform in cmds.ls(type="transform"):
+        cameras = scene_index.get_named(camera_transform_name)
+        transforms = scene_index.get_transforms(cameras)
+
+        for transform in cameras:
             if transform in camera_transform_name :
                 component_name = transform
                 camera_abc_item = camera_item.create_item(
@@ -357,9 +355,9 @@ class MayaSessionCollector(HookBaseClass):
                 camera_abc_item.properties['name'] = component_name
                 camera_abc_item.properties['file_extension'] = "abc"
                 camera_abc_item.properties['namespace'] = component_name.split(":")[0]
-                camera_abc_item.properties['translate'] = cmds.xform(component_name,q=1,t=1)
-                camera_abc_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-                camera_abc_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+                camera_abc_item.properties['translate'] = transforms[component_name]['translate']
+                camera_abc_item.properties['rotate'] = transforms[component_name]['rotate']
+                camera_abc_item.properties['scale'] = transforms[component_name]['scale']
                 camera_abc_item.set_icon_from_path(abc_icon_path)
 
                 camera_maya_item = camera_item.create_item(
@@ -371,26 +369,20 @@ class MayaSessionCollector(HookBaseClass):
                 camera_maya_item.properties['name'] = component_name
                 camera_maya_item.properties['file_extension'] = "mb"
                 camera_maya_item.properties['namespace'] = component_name.split(":")[0]
-                camera_maya_item.properties['translate'] = cmds.xform(component_name,q=1,t=1)
-                camera_maya_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-                camera_maya_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+                camera_maya_item.properties['translate'] = transforms[component_name]['translate']
+                camera_maya_item.properties['rotate'] = transforms[component_name]['rotate']
+                camera_maya_item.properties['scale'] = transforms[component_name]['scale']
 
         self.logger.debug("Collected shot camera : %s"%(shot_name))
 
-    def collect_dummy(self,parent_item):
+    def collect_dummy(self,parent_item,scene_index):
 
         dummy_transform_name = ['mmGeom','aniGeom','mmEnv','mmAnim']
         shot_name = parent_item.context.entity['name']
         start_frame = cmds.playbackOptions(min=1,q=1)
         end_frame = cmds.playbackOptions(max=1,q=1)
 
-        publisher = self.parent
-        entity = publisher.context.entity
-        sg = self.tank.shotgun
-        sub_frame = sg.find_one("Shot",[['id','is',entity['id']]],['sg_sub_frame'])['sg_sub_frame']
-
-        if not sub_frame :
-            sub_frame = 0.25
+        sub_frame = self._get_sub_frame(parent_item)
 
 
         dummy_item = parent_item.create_item(
@@ -417,7 +409,10 @@ class MayaSessionCollector(HookBaseClass):
             "alembic.png"
         )
         
-        for transform in cmds.ls(type="transform"):
+        dummies = scene_index.get_named(dummy_transform_name)
+        transforms = scene_index.get_transforms(dummies)
+
+        for transform in dummies:
             if transform in dummy_transform_name :
                 component_name = transform
                 dummy_abc_item = dummy_item.create_item(
@@ -429,15 +424,27 @@ class MayaSessionCollector(HookBaseClass):
                 dummy_abc_item.properties['name'] = component_name
                 dummy_abc_item.properties['file_extension'] = "abc"
                 dummy_abc_item.properties['namespace'] = component_name.split(":")[0]
-                dummy_abc_item.properties['translate'] = cmds.xform(component_name,q=1,t=1)
-                dummy_abc_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-                dummy_abc_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+                dummy_abc_item.properties['translate'] = transforms[component_name]['translate']
+                dummy_abc_item.properties['rotate'] = transforms[component_name]['rotate']
+                dummy_abc_item.properties['scale'] = transforms[component_name]['scale']
                 dummy_abc_item.set_icon_from_path(abc_icon_path)
                 dummy_abc_item.properties['sub_frame'] = sub_frame
 
 
         self.logger.debug("Collected shot dummy : %s"%(shot_name))
 
+    def _get_sub_frame(self, item):
+        """
+        Return the sub frame step of the context shot, 0.25 when not set.
+
+        :param item: Any item of the publish tree
+        """
+        entity_fields = self.parent.create_hook_instance("{config}/entity_fields.py")
+        entity = self.parent.context.entity
+        sub_frame = entity_fields.get_fields(item, entity, ["sg_sub_frame"])["sg_sub_frame"]
+
+        return sub_frame or 0.25
+
     def collect_current_maya_session(self, settings, parent_item):
         """
         Creates an item that represents the current maya session.
@@ -637,20 +644,14 @@ class MayaSessionCollector(HookBaseClass):
                 # the an indication of what it is and why it was collected
                 item.name = "%s (Render Layer: %s)" % (item.name, layer)
 
-    def collect_sim_dummy(self,parent_item):
+    def collect_sim_dummy(self,parent_item,scene_index):
 
         dummy_transform_name = ['mmGeom','aniGeom']
         shot_name = parent_item.context.entity['name']
         start_frame = cmds.playbackOptions(min=1,q=1)
         end_frame = cmds.playbackOptions(max=1,q=1)
 
-        publisher = self.parent
-        entity = publisher.context.entity
-        sg = self.tank.shotgun
-        sub_frame = sg.find_one("Shot",[['id','is',entity['id']]],['sg_sub_frame'])['sg_sub_frame']
-
-        if not sub_frame :
-            sub_frame = 0.25
+        sub_frame = self._get_sub_frame(parent_item)
 
 
         dummy_item = parent_item.create_item(
@@ -678,9 +679,11 @@ class MayaSessionCollector(HookBaseClass):
             "alembic.png"
         )
         
-        shot_sim_dummy_list = [ x for x in cmds.ls(type="transform") if not x.find('bone_grp') == -1 
-        #and cmds.referenceQuery( x, isNodeReferenced=True )
-        and cmds.ls(x,l=1)[0].split("|")[1].find("setgrp") == -1] 
+        shot_sim_dummy_list = [ x for x in scene_index.buckets['bone_grp']
+        #if cmds.referenceQuery( x, isNodeReferenced=True )
+        if scene_index.get_top_level(x).find("setgrp") == -1] 
+
+        transforms = scene_index.get_transforms(shot_sim_dummy_list)
 
         for dummy in shot_sim_dummy_list:
             component_name = dummy
@@ -694,11 +697,118 @@ class MayaSessionCollector(HookBaseClass):
             dummy_abc_item.properties['name'] = component_name
             dummy_abc_item.properties['file_extension'] = "abc"
             dummy_abc_item.properties['namespace'] = component_name.split(":")[0]
-            dummy_abc_item.properties['translate'] = cmds.xform(component_name,q=1,t=1)
-            dummy_abc_item.properties['rotate'] = cmds.xform(component_name,q=1,ro=1)
-            dummy_abc_item.properties['scale'] = cmds.xform(component_name,q=1,s=1)
+            dummy_abc_item.properties['translate'] = transforms[component_name]['translate']
+            dummy_abc_item.properties['rotate'] = transforms[component_name]['rotate']
+            dummy_abc_item.properties['scale'] = transforms[component_name]['scale']
             dummy_abc_item.set_icon_from_path(abc_icon_path)
             dummy_abc_item.properties['sub_frame'] = sub_frame
 
 
-        self.logger.debug("Collected shot sim dummy : %s"%(shot_name))
\ No newline at end of file
+        self.logger.debug("Collected shot sim dummy : %s"%(shot_name))
+
+
+class SceneIndex(object):
+    """
+    Snapshot of the DAG of the current scene, built in a single traversal.
+
+    Transforms are listed by the same unique short names as
+    cmds.ls(type="transform"), with their long names, parents, children and
+    the transforms whose name contains each of the given patterns.
+    """
+
+    def __init__(self, patterns):
+
+        self.transforms = []
+        self.long_names = {}
+        self.parents = {}
+        self.children = {}
+        self.buckets = dict((x, []) for x in patterns)
+
+        short_names = {}
+        visited = {}
+
+        dag_iter = om.MItDag(om.MItDag.kDepthFirst)
+        while not dag_iter.isDone():
+            node = dag_iter.currentItem()
+            if node.hasFn(om.MFn.kWorld):
+                dag_iter.next()
+                continue
+
+            # instanced nodes are listed once, under their first path. hash
+            # codes can be shared by different nodes, so the handles of a hash
+            # code are compared to tell whether the node itself was visited.
+            handle = om.MObjectHandle(node)
+            handles = visited.setdefault(handle.hashCode(), [])
+            if any(handle == x for x in handles):
+                dag_iter.prune()
+                dag_iter.next()
+                continue
+            handles.append(handle)
+
+            path = dag_iter.getPath()
+            long_name = path.fullPathName()
+            name = path.partialPathName()
+            parent = short_names.get(long_name.rpartition("|")[0])
+            short_names[long_name] = name
+            if parent is not None:
+                self.children.setdefault(parent, []).append(name)
+
+            if node.hasFn(om.MFn.kTransform):
+                self.transforms.append(name)
+                self.long_names[name] = long_name
+                self.parents[name] = parent
+                for pattern, bucket in self.buckets.items():
+                    if pattern in name:
+                        bucket.append(name)
+
+            dag_iter.next()
+
+    def get_transforms(self, names):
+        """
+        Return the local matrix, translate, rotate and scale of transforms,
+        as cmds.xform would query them, read in a single OpenMaya pass.
+
+        OpenMaya works in internal units (centimeters and radians), values
+        are converted to the UI units cmds.xform returns.
+
+        :param list names: Transform names
+        :returns: dict of name to a dict with "matrix", "translate", "rotate"
+            and "scale" lists
+        """
+        # a selection list holds each node once
+        names = list(dict.fromkeys(names))
+        selection = om.MSelectionList()
+        for name in names:
+            selection.add(name)
+
+        transforms = {}
+        for index, name in enumerate(names):
+            transformation = om.MFnTransform(selection.getDagPath(index)).transformation()
+            rotation = transformation.rotation()
+            matrix = list(transformation.asMatrix())
+            matrix[12:15] = [om.MDistance.internalToUI(x) for x in matrix[12:15]]
+            transforms[name] = {
+                "matrix": matrix,
+                "translate": [
+                    om.MDistance.internalToUI(x)
+                    for x in transformation.translation(om.MSpace.kTransform)
+                ],
+                "rotate": [
+                    om.MAngle.internalToUI(x) for x in (rotation.x, rotation.y, rotation.z)
+                ],
+                "scale": list(transformation.scale(om.MSpace.kTransform)),
+            }
+
+        return transforms
+
+    def get_named(self, names):
+        """
+        Return the transforms with one of the given names.
+        """
+        return [x for x in self.transforms if x in names]
+
+    def get_top_level(self, name):
+        """
+        Return the name of the top level transform above a transform.
+        """
+        return self.long_names[name].split("|")[1]
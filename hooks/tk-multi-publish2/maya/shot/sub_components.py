@@ -0,0 +1,123 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Indexes of the shot components of the publish.
+
+* The sub-components of the scene, the transforms below the top of the DAG
+  with a Meshtype attribute set to "component". When the scene has any, the
+  USD caches are written next to each other in a folder named after the
+  publish path, see export_to_local.py.
+* The USD cache of a component holds everything below its node, so a
+  component nested in another one is part of that component's cache and is
+  not exported by itself.
+
+Both are resolved once per publish and kept on the root item, like the
+animation range in animation_range.py. The collector and the post phase
+hook drop them.
+"""
+
+import maya.cmds as cmds
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+# names of the root item properties holding the indexes
+CACHE_PROPERTY = "sub_component_index"
+MESHTYPE_CACHE_PROPERTY = "meshtype_component_index"
+
+# items exported as USD caches by export_to_local.py
+COMPONENT_TYPES = ("maya.session.shot.component.usd", "maya.session.shot.set.usd")
+
+
+class SubComponentIndex(HookBaseClass):
+    """
+    Cached sub-components and nesting of the shot components of the current
+    publish.
+    """
+
+    def get_sub_components(self, item):
+        """
+        Return the long names of the sub-components of the scene.
+
+        :param item: Any item of the publish tree
+        """
+        root_item = _get_root_item(item)
+        index = root_item.properties.get(MESHTYPE_CACHE_PROPERTY)
+        if index is None:
+            # only the nodes that have the attribute are listed, instead of
+            # querying it on every transform of the scene
+            nodes = cmds.ls(
+                "*.Meshtype",
+                recursive=True,
+                objectsOnly=True,
+                long=True,
+                type="transform",
+            ) or []
+            index = sorted(
+                x
+                for x in set(nodes)
+                if x.count("|") > 1
+                and cmds.getAttr(x + ".Meshtype", asString=True) == "component"
+            )
+            root_item.properties[MESHTYPE_CACHE_PROPERTY] = index
+
+        return index
+
+    def get_parent_component(self, item):
+        """
+        Return the name of the outermost component an item is nested in, or
+        None if the item is not below another component.
+
+        :param item: Item with a "name" property
+        """
+        root_item = _get_root_item(item)
+        index = root_item.properties.get(CACHE_PROPERTY)
+        if index is None:
+            names = set(
+                x.properties["name"]
+                for x in root_item.descendants
+                if x.type_spec in COMPONENT_TYPES
+            )
+            long_names = dict(
+                (x, (cmds.ls(x, long=True) or [x])[0]) for x in names
+            )
+
+            index = {}
+            for name, long_name in long_names.items():
+                parents = [
+                    x for x, y in long_names.items() if long_name.startswith(y + "|")
+                ]
+                index[name] = (
+                    min(parents, key=lambda x: long_names[x].count("|"))
+                    if parents
+                    else None
+                )
+            root_item.properties[CACHE_PROPERTY] = index
+
+        return index.get(item.properties["name"])
+
+    def invalidate(self, item):
+        """
+        Drop the cached indexes so the next lookup queries the scene again.
+
+        :param item: Any item of the publish tree
+        """
+        root_item = _get_root_item(item)
+        root_item.properties.pop(CACHE_PROPERTY, None)
+        root_item.properties.pop(MESHTYPE_CACHE_PROPERTY, None)
+
+
+def _get_root_item(item):
+
+    while item.parent:
+        item = item.parent
+
+    return item
@@ -37,8 +37,6 @@ class NukeRetimePublishPlugin(HookBaseClass):
         """
         base_settings = super(NukeRetimePublishPlugin, self).settings or {}
 
-        self.init()
-
         nuke_publish_settings = {
             "Publish Template": {
                 "type": "template",
@@ -82,7 +80,7 @@ class NukeRetimePublishPlugin(HookBaseClass):
         return {"accepted": False}
     
 
-    def init(self):
+    def init(self, item):
         # 현재 Toolkit 컨텍스트 가져오기
         self.__engine = sgtk.platform.current_engine() 
         self.__context = self.__engine.context
@@ -90,9 +88,12 @@ class NukeRetimePublishPlugin(HookBaseClass):
         self.__sg = self.__engine.shotgun
         self.__user = self.__context.user
         self.__shot_ent = self.__context.entity
-        self.__project_info = self.__sg.find_one("Project", [['id', 'is', self.__project['id']]],
+        # 퍼블리쉬 세션 동안 루트 아이템에 캐시된 필드 사용
+        entity_fields = self.parent.create_hook_instance("{config}/entity_fields.py")
+        self.__project_info = entity_fields.get_fields(item, self.__project,
                                                 ['sg_color_space', 'sg_mov_codec', 'sg_out_format', 'sg_fps', 'sg_mov_colorspace'])
-        self.__user_info = self.__sg.find_one('HumanUser', [['id', 'is', self.__user['id']]], ['sg_initials'])
+        self.__project_info['id'] = self.__project['id']
+        self.__user_info = entity_fields.get_fields(item, self.__user, ['sg_initials'])
         self.__first_frame = int(nuke.root()["first_frame"].value())
         self.__last_frame = int(nuke.root()["last_frame"].value())
 
@@ -142,6 +143,8 @@ class NukeRetimePublishPlugin(HookBaseClass):
             error_msg = "Nuke 스크립트가 저장되지 않았습니다."
             self.logger.error(error_msg)
             raise Exception(error_msg)
+
+        self.init(item)
         
         #write 노드가 존재하는지 확인
         write_nodes = [node for node in nuke.allNodes() if node.Class() == "Write"]
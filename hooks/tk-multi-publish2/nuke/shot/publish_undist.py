@@ -124,9 +124,9 @@ class NukeUndistPublishPlugin(HookBaseClass):
 
         self.__engine = sgtk.platform.current_engine()
         self.__context = self.__engine.context
-        sg = self.__engine.shotgun
         entity =  self.__context.entity
-        resolution = sg.find_one("Shot", [['id', 'is', entity['id']]],['sg_resolution'])
+        entity_fields = self.parent.create_hook_instance("{config}/entity_fields.py")
+        resolution = entity_fields.get_fields(item, entity, ['sg_resolution'])
         # print(resolution)
         # print(resolution["sg_resolution"])
 
@@ -138,7 +138,8 @@ class NukeUndistPublishPlugin(HookBaseClass):
 
         if self.compare_resolution(undist_resolution,resolution["sg_resolution"]):
             print("undist 적용해야함")
-            sg.update(
+            entity_fields.update(
+                item,
                 "Shot",
                 entity['id'],
                 {
@@ -81,6 +81,9 @@ class NukeSessionCollector(HookBaseClass):
         publisher = self.parent
         engine = publisher.engine
 
+        # shotgrid fields are cached on the root item for this session
+        publisher.create_hook_instance("{config}/entity_fields.py").invalidate(parent_item)
+
         current_task = publisher.context.task
         task_name = current_task['name']
 
@@ -0,0 +1,85 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Tests for the frame chunks of alembic_chunks.py, run without Maya.
+"""
+
+import os
+import sys
+import types
+import unittest
+import importlib.util
+from unittest import mock
+
+CONFIG_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_hook_module():
+    """
+    Import the hook with a stubbed sgtk module.
+    """
+    sgtk = types.ModuleType("sgtk")
+    sgtk.get_hook_baseclass = lambda: object
+    spec = importlib.util.spec_from_file_location(
+        "alembic_chunks",
+        os.path.join(CONFIG_ROOT, "hooks", "tk-multi-publish2", "maya", "shot", "alembic_chunks.py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(sys.modules, {"sgtk": sgtk}):
+        spec.loader.exec_module(module)
+
+    return module
+
+
+class TestAlembicChunks(unittest.TestCase):
+    def setUp(self):
+        self.module = load_hook_module()
+        self.job = (
+            "-renderableOnly -eulerFilter -step 1.000000 -fr 991 1250 "
+            "-root |char:rig -file /show/shot/char.abc"
+        )
+
+    def test_get_chunks(self):
+        chunks = self.module.AlembicChunkExport().get_chunks(991, 1250, 1.0, 100)
+        self.assertEqual(chunks, [(991, 1090.0), (1091, 1190.0), (1191, 1250)])
+
+    def test_get_chunks_disabled(self):
+        hook = self.module.AlembicChunkExport()
+        self.assertEqual(hook.get_chunks(991, 1250, 1.0, 0), [])
+        self.assertEqual(hook.get_chunks(991, 1050, 1.0, 100), [])
+
+    def test_first_chunk_job(self):
+        job = self.module.get_chunk_job(self.job, 991, 1090, "/show/shot/char.chunk000.abc", 0)
+        self.assertEqual(
+            job,
+            "-renderableOnly -eulerFilter -step 1.000000 -fr 991.000000 1090.000000 "
+            "-root |char:rig -file /show/shot/char.chunk000.abc -dataFormat ogawa",
+        )
+
+    def test_chunk_job_pre_roll(self):
+        job = self.module.get_chunk_job(self.job, 1091, 1190, "/show/shot/char.chunk001.abc", 10)
+        self.assertEqual(
+            job,
+            "-renderableOnly -eulerFilter -step 1.000000 "
+            "-fr 1081.000000 1090.000000 -pr -fr 1091.000000 1190.000000 "
+            "-root |char:rig -file /show/shot/char.chunk001.abc -dataFormat ogawa",
+        )
+        self.assertNotIn("-prs", job)
+
+    def test_chunk_job_keeps_data_format(self):
+        job = self.module.get_chunk_job(
+            self.job + " -dataFormat hdf", 1091, 1190, "C:\\show\\char.chunk001.abc", 10
+        )
+        self.assertTrue(job.endswith("-file C:/show/char.chunk001.abc -dataFormat hdf"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Tests for the Software lookup of the app_launch hook, run against a fake
+ShotGrid without tk-core.
+"""
+
+import os
+import sys
+import types
+import unittest
+import importlib.util
+from unittest import mock
+
+CONFIG_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROJECT = {'type': 'Project', 'id': 1}
+
+
+def load_hook_module():
+    """
+    Import the hook with stubbed tank and sgtk modules.
+    """
+    tank = types.ModuleType('tank')
+    tank.Hook = object
+    sgtk = types.ModuleType('sgtk')
+    sgtk_util = types.ModuleType('sgtk.util')
+    sgtk_filesystem = types.ModuleType('sgtk.util.filesystem')
+    sgtk_filesystem.ensure_folder_exists = lambda path: os.makedirs(path, exist_ok=True)
+    stubs = {
+        'tank': tank,
+        'sgtk': sgtk,
+        'sgtk.util': sgtk_util,
+        'sgtk.util.filesystem': sgtk_filesystem,
+        }
+
+    spec = importlib.util.spec_from_file_location(
+        'app_launch', os.path.join(CONFIG_ROOT, 'hooks', 'app_launch.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(sys.modules, stubs):
+        spec.loader.exec_module(module)
+
+    return module
+
+
+class FakeShotgun(object):
+    """
+    Answers Software queries from a fixed table and records them.
+    """
+
+    def __init__(self):
+
+        self.calls = []
+        self.software = [
+            {'type': 'Software', 'id': 1, 'code': 'Maya 2022', 'projects': [],
+             'sg_rez': 'maya-2022', 'sg_win_rez': 'maya-2022'},
+            {'type': 'Software', 'id': 2, 'code': 'Maya 2022', 'projects': [PROJECT],
+             'sg_rez': 'maya-2022,show_tools', 'sg_win_rez': 'maya-2022,show_tools_win'},
+            {'type': 'Software', 'id': 3, 'code': 'Nuke 13.2', 'projects': [],
+             'sg_rez': 'nuke-13.2', 'sg_win_rez': 'nuke-13.2'},
+            ]
+
+    def find(self, entity_type, filters, fields):
+
+        self.calls.append((entity_type, filters, fields))
+
+        return [dict(x) for x in self.software]
+
+
+class TestSoftwareRezTable(unittest.TestCase):
+
+    def setUp(self):
+
+        self.module = load_hook_module()
+        self.sg = FakeShotgun()
+        self.now = [1000.0]
+        self.module.time = types.SimpleNamespace(time=lambda: self.now[0])
+
+    def test_single_find(self):
+        """
+        All the engines share one Software query.
+        """
+        packages = self.module.get_rez_packages(self.sg, 'maya', '2022', 'linux', PROJECT)
+        self.assertEqual(packages, ['maya-2022', 'show_tools'])
+        packages = self.module.get_rez_packages(self.sg, 'nuke', '13.2', 'win32', PROJECT)
+        self.assertEqual(packages, ['nuke-13.2'])
+        self.assertIsNone(self.module.get_rez_packages(self.sg, 'houdini', '19.5', 'linux', PROJECT))
+
+        self.assertEqual(len(self.sg.calls), 1)
+        entity_type, filters, fields = self.sg.calls[0]
+        self.assertEqual(entity_type, 'Software')
+        self.assertEqual(set(fields), set(['code', 'projects', 'sg_rez', 'sg_win_rez']))
+
+    def test_project_entry_wins(self):
+        """
+        The Software entity linked to the project is used over the global one.
+        """
+        table = self.module.get_software_rez_table(self.sg, PROJECT)
+        self.assertEqual(table['Maya 2022']['project']['id'], 2)
+        self.assertEqual(table['Maya 2022']['global']['id'], 1)
+        self.assertEqual(
+            self.module.get_rez_packages(self.sg, 'maya', '2022', 'win32', PROJECT),
+            ['maya-2022', 'show_tools_win'])
+
+    def test_ttl(self):
+        """
+        The table is reused until it is SOFTWARE_CACHE_TTL seconds old.
+        """
+        self.module.get_software_rez_table(self.sg, PROJECT)
+        self.now[0] += self.module.SOFTWARE_CACHE_TTL - 1
+        self.module.get_software_rez_table(self.sg, PROJECT)
+        self.assertEqual(len(self.sg.calls), 1)
+
+        self.now[0] += 1
+        self.module.get_software_rez_table(self.sg, PROJECT)
+        self.assertEqual(len(self.sg.calls), 2)
+
+        # tables are cached per project
+        self.module.get_software_rez_table(self.sg, None)
+        self.assertEqual(len(self.sg.calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Tests for the frame_sequence hook, run against a fake template without
+tk-core.
+"""
+
+import os
+import re
+import sys
+import types
+import unittest
+import importlib.util
+from unittest import mock
+
+CONFIG_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_hook_module():
+    """
+    Import the hook with a stubbed sgtk module.
+    """
+    sgtk = types.ModuleType("sgtk")
+    sgtk.get_hook_baseclass = lambda: object
+    spec = importlib.util.spec_from_file_location(
+        "frame_sequence", os.path.join(CONFIG_ROOT, "hooks", "frame_sequence.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(sys.modules, {"sgtk": sgtk}):
+        spec.loader.exec_module(module)
+
+    return module
+
+
+class FakeTemplate(object):
+    """
+    Template of the plate frames of a shot, /show/{Shot}/plate.{SEQ}.exr, with
+    a four digit sequence key.
+    """
+
+    keys = {"SEQ": types.SimpleNamespace(format_spec="04")}
+
+    def apply_fields(self, fields):
+
+        frame = fields["SEQ"]
+        if not isinstance(frame, str):
+            frame = "%04d" % frame
+
+        return "/show/%s/plate.%s.exr" % (fields["Shot"], frame)
+
+    def get_fields(self, path):
+
+        match = re.match(r"^/show/(\w+)/plate\.(\d{4,})\.exr$", path)
+
+        return {"Shot": match.group(1), "SEQ": int(match.group(2))}
+
+
+class TestFrameSequence(unittest.TestCase):
+    def setUp(self):
+        self.hook = load_hook_module().FrameSequenceHook()
+        self.template = FakeTemplate()
+
+    def test_round_trip(self):
+        """
+        Paths match the template and give their frame back, including frames
+        wider than the padding.
+        """
+        frames = [1, 999, 1001, 9999, 10000, 123456]
+        paths = self.hook.apply_fields_to_frames(self.template, {"Shot": "sh010"}, frames)
+
+        self.assertEqual(paths[0], "/show/sh010/plate.0001.exr")
+        self.assertEqual(paths[-1], "/show/sh010/plate.123456.exr")
+        for frame, path in zip(frames, paths):
+            self.assertEqual(path, self.template.apply_fields({"Shot": "sh010", "SEQ": frame}))
+            self.assertEqual(self.template.get_fields(path)["SEQ"], frame)
+
+    def test_no_frames(self):
+        self.assertEqual(self.hook.apply_fields_to_frames(self.template, {"Shot": "sh010"}, []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
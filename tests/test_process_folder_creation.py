@@ -0,0 +1,113 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Tests for the process_folder_creation core hook, run without tk-core.
+"""
+
+import os
+import sys
+import types
+import shutil
+import logging
+import tempfile
+import unittest
+import importlib.util
+
+CONFIG_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_hook_module():
+    """
+    Import the core hook with a stubbed tank module.
+    """
+
+    class Hook(object):
+        def __init__(self):
+            self.logger = logging.getLogger("test_process_folder_creation")
+
+    tank = types.ModuleType("tank")
+    tank.Hook = Hook
+    sys.modules.setdefault("tank", tank)
+    spec = importlib.util.spec_from_file_location(
+        "process_folder_creation",
+        os.path.join(CONFIG_ROOT, "core", "hooks", "process_folder_creation.py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+class TestDeferredFolderCreation(unittest.TestCase):
+    def setUp(self):
+        self.module = load_hook_module()
+        self.root = tempfile.mkdtemp(prefix="test_process_folder_creation_")
+        self.addCleanup(shutil.rmtree, self.root, True)
+
+        self.env = dict(os.environ)
+        self.addCleanup(os.environ.update, self.env)
+        os.environ["TK_DEFER_FOLDER_CREATION"] = "1"
+        # long enough for the timer never to fire during the test
+        os.environ["TK_DEFERRED_FOLDER_DELAY"] = "60"
+
+        self.source = os.path.join(self.root, "placeholder_source")
+        with open(self.source, "w") as fh:
+            fh.write("placeholder")
+
+    def tearDown(self):
+        with self.module._deferred_lock:
+            if self.module._deferred_timer is not None:
+                self.module._deferred_timer.cancel()
+            del self.module._deferred_items[:]
+
+    def test_copy_below_deferred_folder(self):
+        """
+        A copy item below a deferred folder is created right away with the
+        folders holding it, the other folders are deferred.
+        """
+        work_area = os.path.join(self.root, "shot", "dev", "maya")
+        snapshots = os.path.join(work_area, "snapshots")
+        scenes = os.path.join(work_area, "scenes")
+        target = os.path.join(snapshots, "placeholder")
+        items = [
+            {"action": "folder", "path": work_area, "metadata": {"defer_creation": True}},
+            {"action": "folder", "path": snapshots, "metadata": {}},
+            {"action": "folder", "path": scenes, "metadata": {}},
+            {"action": "copy", "source_path": self.source, "target_path": target},
+        ]
+
+        hook = self.module.ProcessFolderCreation()
+        locations = hook.execute(items, False)
+
+        self.assertEqual(locations, [work_area, snapshots, target])
+        self.assertTrue(os.path.isfile(target))
+        self.assertFalse(os.path.exists(scenes))
+
+        with self.module._deferred_lock:
+            self.module._deferred_timer.cancel()
+        hook._flush_deferred_items()
+
+        self.assertTrue(os.path.isdir(scenes))
+
+    def test_remote_entity_folder(self):
+        """
+        Remote entity folders are left alone, as in the stock core hook.
+        """
+        remote = os.path.join(self.root, "remote")
+        locations = self.module.ProcessFolderCreation().execute(
+            [{"action": "remote_entity_folder", "path": remote}], False
+        )
+
+        self.assertEqual(locations, [])
+        self.assertFalse(os.path.exists(remote))
+
+if __name__ == "__main__":
+    unittest.main()